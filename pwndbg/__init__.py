@@ -19,6 +19,8 @@ import pwndbg.elf
 import pwndbg.proc
 import pwndbg.regs
 import pwndbg.stack
+import pwndbg.prefetch
+import pwndbg.reghistory
 import pwndbg.stdio
 import pwndbg.color
 import pwndbg.typeinfo
@@ -46,6 +48,11 @@ import pwndbg.commands.dumpargs
 import pwndbg.commands.cpsr
 import pwndbg.commands.argv
 import pwndbg.commands.heap
+import pwndbg.commands.snapshot
+import pwndbg.commands.prefetch
+import pwndbg.commands.memoize
+import pwndbg.commands.events
+import pwndbg.commands.reghistory
 
 
 __all__ = [
@@ -54,6 +61,7 @@ __all__ = [
 'chain',
 'color',
 'compat',
+'diskcache',
 'disasm',
 'dt',
 'elf',
@@ -68,13 +76,17 @@ __all__ = [
 'malloc',
 'memoize',
 'memory',
+'prefetch',
 'proc',
+'reghistory',
 'regs',
 'remote',
 'search',
+'snapshot',
 'stack',
 'strings',
 'symbol',
+'symtab',
 'typeinfo',
 'ui',
 'vmmap'
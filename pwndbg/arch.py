@@ -22,8 +22,23 @@ def fix_arch(arch):
     arches = ['x86-64', 'i386', 'mips', 'powerpc', 'sparc', 'arm', 'aarch64', arch]
     return next(a for a in arches if a in arch)
 
-@pwndbg.events.start
-@pwndbg.events.stop
+def target():
+    """
+    Returns the inputs of update(): those of pwndbg.typeinfo.update,
+    and the "set endian" setting.
+
+    The setting is cheap to read, unlike "show endian", which update()
+    only runs when the inputs change.
+    """
+    try:
+        setting = gdb.parameter('endian')
+    except RuntimeError:
+        setting = None
+
+    return pwndbg.typeinfo.target() + (setting,)
+
+@pwndbg.events.start(after=[pwndbg.typeinfo.update], inputs=target)
+@pwndbg.events.stop(after=[pwndbg.typeinfo.update], inputs=target)
 def update():
     m = sys.modules[__name__]
 
@@ -8,15 +8,13 @@ argv = None
 envp = None
 envc = None
 
-@pwndbg.events.start
+@pwndbg.events.start(after=[pwndbg.arch.update])
 def update():
     global argc
     global argv
     global envp
     global envc
 
-    pwndbg.arch.update() # :-(
-
     sp = pwndbg.regs.sp
     ptrsize = pwndbg.arch.ptrsize
     ptrbits  = 8 * ptrsize
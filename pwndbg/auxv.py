@@ -130,19 +130,11 @@ def find_stack_boundary(addr):
     # before binaries in memory.  This means that we walk right past the
     # stack and to the end of some random ELF.
     #
-    # In order to mitigate this, we search page-by-page until either:
+    # In order to mitigate this, pwndbg.stack stops at either:
     #
-    # 1) We get a page fault, and stop
-    # 2) We find an ELF header, and stop
-    addr = pwndbg.memory.page_align(int(addr))
-    try:
-        while True:
-            if b'\x7fELF' == pwndbg.memory.read(addr, 4):
-                break
-            addr += pwndbg.memory.PAGE_SIZE
-    except gdb.MemoryError:
-        pass
-    return addr
+    # 1) The first page fault
+    # 2) The first ELF header
+    return pwndbg.stack.find_upper_stack_boundary(addr, max_pages=1 << 20)
 
 def walk_stack():
     auxv = walk_stack2(0)
@@ -23,7 +23,7 @@ def get(address, limit=LIMIT):
 
         result.append(address)
         try:
-            address = int(pwndbg.memory.poi(pwndbg.typeinfo.ppvoid, address))
+            address = pwndbg.memory.pointer(address)
         except gdb.MemoryError:
             break
 
@@ -24,8 +24,8 @@ class _Command(gdb.Command):
     count    = 0
     commands = []
 
-    def __init__(self, function):
-        super(_Command, self).__init__(function.__name__, gdb.COMMAND_USER, gdb.COMPLETE_EXPRESSION)
+    def __init__(self, function, name=None):
+        super(_Command, self).__init__(name or function.__name__, gdb.COMMAND_USER, gdb.COMPLETE_EXPRESSION)
         self.function = function
 
         self.commands.append(self)
@@ -86,14 +86,72 @@ def OnlyWhenRunning(function):
             print("Only available when running")
     return _OnlyWhenRunning
 
-def Command(func):
+def Command(func=None, name=None):
+    """
+    Registers ``func`` as a GDB command.  The command is named after the
+    function, unless a different name is given, e.g.:
+
+        @pwndbg.commands.Command(name='foo-bar')
+        def foo_bar(): ...
+    """
+    if func is None:
+        return functools.partial(Command, name=name)
     class C(_Command):
         __doc__ = func.__doc__
-        __name__ = func.__name__
-    return C(func)
+        __name__ = name or func.__name__
+    return C(func, name)
 
-def ParsedCommand(func):
+def ParsedCommand(func=None, name=None):
+    if func is None:
+        return functools.partial(ParsedCommand, name=name)
     class C(_ParsedCommand):
         __doc__ = func.__doc__
-        __name__ = func.__name__
-    return C(func)
+        __name__ = name or func.__name__
+    return C(func, name)
+
+def stats_table(module, command, columns, option, count=None):
+    """
+    Shared implementation of the ``*-stats`` commands for ``module``,
+    which has ``stats``, ``get_stats()`` and ``reset_stats()``.
+
+    ``columns`` is a sequence of ``(name, width, conversion)``, e.g.
+    ``('time', 10, '.4f')``.  A negative width aligns to the left.
+
+    Handles 'on', 'off' and 'reset', and otherwise prints the statistics
+    sorted by the column ``option``, limited to the first ``count`` rows.
+
+    Returns:
+        False if ``option`` was not understood, otherwise True.
+    """
+    if option in ('on', 'off'):
+        module.stats = (option == 'on')
+        return True
+
+    if option == 'reset':
+        module.reset_stats()
+        return True
+
+    names = [name for name, width, conversion in columns]
+
+    if option not in names:
+        return False
+
+    if not module.stats:
+        print(pwndbg.color.red("Statistics are disabled, use '%s on'" % command))
+
+    # Text columns sort alphabetically, numbers largest first
+    text  = [name for name, width, conversion in columns if conversion == 's']
+    stats = module.get_stats()
+    stats.sort(key=lambda s: s[option], reverse=option not in text)
+
+    if count is not None:
+        stats = stats[:int(count)]
+
+    header = ' '.join('%%%is' % width for name, width, conversion in columns)
+    row    = ' '.join('%%%i%s' % (width, conversion) for name, width, conversion in columns)
+
+    print(header % tuple(names))
+    for s in stats:
+        print(row % tuple(s[name] for name in names))
+
+    return True
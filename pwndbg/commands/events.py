@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Command to show how long each event handler takes.
+"""
+from __future__ import print_function
+
+import pwndbg.commands
+import pwndbg.events
+
+columns = (('name',       -50, 's'),
+           ('event',       -8, 's'),
+           ('calls',        8, 'i'),
+           ('skipped',      8, 'i'),
+           ('exceptions',  10, 'i'),
+           ('time',        10, '.4f'),
+           ('max',         10, '.4f'))
+
+
+@pwndbg.commands.Command(name='events-stats')
+def events_stats(option='time', count=None):
+    """
+    Show call, skip and exception counts, cumulative and maximum
+    wall-clock time for each event handler.
+
+    Statistics are only collected while enabled.  Handlers which take
+    longer than the slow threshold (in seconds) always print a warning.
+
+    > events-stats on
+    > events-stats [name|event|calls|skipped|exceptions|time|max] [count]
+    > events-stats reset
+    > events-stats slow 0.05
+    > events-stats slow off
+    > events-stats off
+    """
+    if option == 'slow':
+        if count is None:
+            print("Slow handler threshold: %s" % pwndbg.events.slow)
+        elif count == 'off':
+            pwndbg.events.slow = None
+        else:
+            pwndbg.events.slow = float(count)
+        return
+
+    if not pwndbg.commands.stats_table(pwndbg.events, 'events-stats', columns, option, count):
+        print(events_stats.__doc__)
@@ -30,7 +30,10 @@ def hexdump(address=None, count=64):
     # if address is None:
     # 	address =
 
-    data = pwndbg.memory.read(address, count, partial=True)
+    data, fault = pwndbg.memory.read_partial(address, count, view=True)
 
     for line in pwndbg.hexdump.hexdump(data, address=address):
         print(line)
+
+    if fault is not None:
+        print("<Could not read memory at %#x>" % fault)
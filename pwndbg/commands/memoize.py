@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Command to show how effective each memoized function's cache is.
+"""
+from __future__ import print_function
+
+import pwndbg.commands
+import pwndbg.memoize
+
+columns = (('name',       -40, 's'),
+           ('kind',        -8, 's'),
+           ('hits',         8, 'i'),
+           ('misses',       8, 'i'),
+           ('executions',  10, 'i'),
+           ('time',        10, '.4f'),
+           ('entries',      8, 'i'))
+
+
+@pwndbg.commands.Command(name='memoize-stats')
+def memoize_stats(option='time', *args):
+    """
+    Show hit, miss and execution counts, cumulative execution time and
+    number of entries for each memoized function.
+
+    Statistics are only collected while enabled.  The maximum number of
+    entries and of bytes held by a function's cache can also be changed,
+    where 'none' means unbounded.
+
+    > memoize-stats on
+    > memoize-stats [name|kind|hits|misses|executions|time|entries] [count]
+    > memoize-stats reset
+    > memoize-stats off
+    > memoize-stats resize <name> <maxsize|none> [maxbytes|none]
+    """
+    if option == 'resize' and 1 < len(args) < 4:
+        resize(*args)
+    elif len(args) > 1 or not pwndbg.commands.stats_table(pwndbg.memoize, 'memoize-stats', columns, option, *args):
+        print(memoize_stats.__doc__)
+
+def bound(value):
+    if value is None or value == 'none':
+        return None
+    return int(value, 0)
+
+def resize(name, maxsize, maxbytes=None):
+    """
+    Sets the bounds of the caches of the memoized functions called
+    ``name``, e.g. 'pwndbg.vmmap.find' or just 'find'.
+    """
+    caches = [obj for obj in pwndbg.memoize.all_caches()
+              if obj.name == name or obj.name.endswith('.' + name)]
+
+    if not caches:
+        print("No memoized function named %r" % name)
+        return
+
+    for obj in caches:
+        obj.resize(bound(maxsize), bound(maxbytes))
+        print("%s: maxsize=%s maxbytes=%s" % (obj.name, obj.maxsize, obj.maxbytes))
@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Command to inspect and tune the memory prefetched on each stop.
+"""
+from __future__ import print_function
+
+import gdb
+import pwndbg.commands
+import pwndbg.prefetch
+
+
+@pwndbg.commands.Command
+def prefetch(option=None, value=None):
+    """
+    Show or change what memory is prefetched when the inferior stops.
+
+    > prefetch
+    > prefetch stack 0x400
+    > prefetch code 0x100
+    > prefetch off
+    """
+    if option in ('on', 'off'):
+        pwndbg.prefetch.enabled = (option == 'on')
+    elif option in ('stack', 'code') and value is not None:
+        setattr(pwndbg.prefetch, option + '_size', int(gdb.parse_and_eval(value)))
+    elif option is not None:
+        print(prefetch.__doc__)
+        return
+
+    p = pwndbg.prefetch
+    print("%-10s %s" % ("enabled", 'on' if p.enabled else 'off'))
+    print("%-10s %#x" % ("stack", p.stack_size))
+    print("%-10s %#x" % ("code", p.code_size))
+    print("Last stop: prefetched %i pages in %i reads" % (p.pages, p.reads))
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Command to query the registers recorded at previous stops.
+"""
+from __future__ import print_function
+
+import gdb
+import pwndbg.color
+import pwndbg.commands
+import pwndbg.reghistory
+import pwndbg.symbol
+import pwndbg.vmmap
+
+
+def format_row(row, reg, value):
+    pc = '%#x' % row.pc if row.pc is not None else '?'
+
+    symbol = pwndbg.symbol.get(row.pc) if row.pc is not None else ''
+    if symbol:
+        pc += ' <%s>' % symbol
+
+    value = pwndbg.color.get(value) if value is not None else '?'
+    return "stop %-6i pc %-30s %s = %s" % (row.stop, pc, reg, value)
+
+def find_pages(mapping):
+    """
+    Returns the pages whose objfile contains ``mapping``, or
+    otherwise the page containing the address ``mapping``.
+    """
+    pages = [page for page in pwndbg.vmmap.get() if mapping in page.objfile]
+
+    if not pages:
+        try:
+            page = pwndbg.vmmap.find(int(gdb.parse_and_eval(mapping)))
+        except gdb.error:
+            page = None
+        if page:
+            pages = [page]
+
+    return pages
+
+@pwndbg.commands.Command(name='regs-history')
+def regs_history(action=None, reg=None, arg=None):
+    """
+    Query the registers recorded at the last few stops.
+
+    > regs-history changed rax        (when rax last changed)
+    > regs-history values rax [count] (values of rax at the last stops)
+    > regs-history points rax libc    (stops where rax pointed into a mapping)
+    > regs-history points rax $sp
+    > regs-history size 4096
+    > regs-history clear
+    """
+    if reg is not None:
+        reg = reg.lstrip('$')
+
+    if action == 'changed' and reg and arg is None:
+        change = pwndbg.reghistory.last_change(reg)
+
+        if change is None:
+            print("%s did not change in the last %i stops" % (reg, len(pwndbg.reghistory.history)))
+            return
+
+        for row in change:
+            print(format_row(row, reg, pwndbg.reghistory.value(row, reg)))
+
+    elif action == 'values' and reg:
+        count = int(arg) if arg is not None else 10
+        for row, value in pwndbg.reghistory.values(reg, count):
+            print(format_row(row, reg, value))
+
+    elif action == 'points' and reg and arg is not None:
+        pages = find_pages(arg)
+
+        if not pages:
+            print(pwndbg.color.red("No mapping matches %r" % arg))
+            return
+
+        for row, value in pwndbg.reghistory.pointing_into(reg, pages):
+            print(format_row(row, reg, value))
+
+    elif action == 'size' and reg is not None and arg is None:
+        pwndbg.reghistory.resize(int(reg))
+
+    elif action == 'clear' and reg is None:
+        pwndbg.reghistory.history.clear()
+
+    else:
+        print(regs_history.__doc__)
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Commands for saving snapshots of writable memory, and diffing them
+to find out what changed.
+"""
+from __future__ import print_function
+
+import pwndbg.color
+import pwndbg.commands
+import pwndbg.snapshot
+import pwndbg.vmmap
+
+
+@pwndbg.commands.Command
+@pwndbg.commands.OnlyWhenRunning
+def snapshot(action='list', *names):
+    """
+    Save, list, delete and diff snapshots of writable memory.
+
+    > snapshot save before
+    > snapshot save after
+    > snapshot diff before after
+    > snapshot list
+    > snapshot delete before
+    """
+    if action == 'save' and len(names) == 1:
+        s = pwndbg.snapshot.save(names[0])
+        print("Saved %r (%i pages, %i unique)" % (s.name, len(s), len(pwndbg.snapshot.store.pages)))
+
+    elif action == 'diff' and len(names) == 2:
+        for name in names:
+            if name not in pwndbg.snapshot.snapshots:
+                print(pwndbg.color.red("No snapshot named %r" % name))
+                return
+
+        for start, end in pwndbg.snapshot.diff(*names):
+            page   = pwndbg.vmmap.find(start)
+            region = page.objfile if page else ''
+            print(pwndbg.color.get(start, '%#x-%#x' % (start, end)), '%#6x' % (end-start), region)
+
+    elif action == 'delete' and len(names) == 1:
+        if names[0] not in pwndbg.snapshot.snapshots:
+            print(pwndbg.color.red("No snapshot named %r" % names[0]))
+            return
+        pwndbg.snapshot.delete(names[0])
+
+    elif action == 'list' and not names:
+        for name, s in sorted(pwndbg.snapshot.snapshots.items()):
+            print("%-20s %i pages" % (name, len(s)))
+
+    else:
+        print(snapshot.__doc__)
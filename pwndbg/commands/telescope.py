@@ -59,10 +59,15 @@ def telescope(address=None, count=8, to_string=False):
     else:
         longest_regs = 0
 
+    # Find how far we can go, without reading every slot up front
+    pages    = (stop - pwndbg.memory.page_align(start) + pwndbg.memory.PAGE_SIZE - 1) // pwndbg.memory.PAGE_SIZE
+    end      = pwndbg.memory.find_upper_boundary(start, max(pages, 1))
+    readable = max(end - start, 0) // ptrsize
+
     # Print everything out
     result = []
     for i,addr in enumerate(range(start, stop, step)):
-        if not pwndbg.memory.peek(addr):
+        if i >= readable:
             result.append("<Could not read memory at %#x>" % addr)
             break
         line = ' '.join(("%02x:%04x|" % (i, addr-start),
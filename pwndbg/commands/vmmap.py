@@ -25,10 +25,8 @@ def vmmap(map=None):
 
     print(pwndbg.color.legend())
 
-    for page in pwndbg.vmmap.get():
-        if str_map and str_map not in page.objfile:
-            continue
-        if int_map and int_map not in page:
-            continue
+    table = pwndbg.vmmap.table()
 
+    for i in table.where(objfile=str_map or None, address=int_map or None):
+        page = table[i]
         print(pwndbg.color.get(page.vaddr, text=str(page)))
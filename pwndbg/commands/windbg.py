@@ -12,16 +12,6 @@ import pwndbg.arch
 import pwndbg.commands
 import pwndbg.memory
 import pwndbg.strings
-import pwndbg.typeinfo
-
-
-def get_type(size):
-    return {
-    1: pwndbg.typeinfo.uint8,
-    2: pwndbg.typeinfo.uint16,
-    4: pwndbg.typeinfo.uint32,
-    8: pwndbg.typeinfo.uint64,
-    }[size]
 
 @pwndbg.commands.ParsedCommand
 @pwndbg.commands.OnlyWhenRunning
@@ -68,16 +58,13 @@ def dX(size, address, count, to_string=False):
     """
     Traditionally, windbg will display 16 bytes of data per line.
     """
-    values = []
     address = int(address) & pwndbg.arch.ptrmask
-    type   = get_type(size)
-    for i in range(count):
-        try:
-            gval = pwndbg.memory.poi(type, address + i * size)
-            # print(str(gval))
-            values.append(int(gval))
-        except gdb.MemoryError:
-            break
+    count   = int(count)
+
+    try:
+        values = pwndbg.memory.unpack_array(address, count, size, partial=True)
+    except gdb.MemoryError:
+        values = []
 
     n_rows = int(math.ceil(count * size / float(16)))
     row_sz = int(16 / size)
@@ -7,6 +7,11 @@ inconsistencies which arise from this.
 """
 import sys
 
+try:
+    from collections.abc import Hashable
+except ImportError:
+    from collections import Hashable
+
 # Quickly determine which version is running
 python2 = sys.version_info.major == 2
 python3 = sys.version_info.major == 3
@@ -15,3 +20,7 @@ if python3:
     basestring = str
 else:
     basestring = basestring
+
+# Typecode for arrays of unsigned 64-bit integers.  Python 2 has no 'Q',
+# but 'L' is 64 bits wide on the LP64 systems GDB runs on.
+uint64 = 'Q' if python3 else 'L'
@@ -14,6 +14,7 @@ import pwndbg.memory
 import pwndbg.symbol
 import pwndbg.memoize
 import pwndbg.jump
+import pwndbg.vmmap
 
 import capstone
 from capstone import *
@@ -59,11 +60,36 @@ def get_disassembler(pc):
         d.mode = {4:CS_MODE_32, 8:CS_MODE_64}[pwndbg.arch.ptrsize]
     return d
 
+@pwndbg.memoize.reset_on_change(depends=('maps', 'writes'), maxsize=16384)
+def read_static_code(address, size):
+    return pwndbg.memory.read(address, size, partial=True)
+
+def read_code(address, size):
+    """
+    Reads up to ``size`` bytes of code at ``address``.
+
+    Code in pages which are not writable can only change if the memory
+    layout changes, or if the debugger writes to it, so it is kept
+    across stops.  This is only done when the memory layout comes from
+    /proc/$PID/maps.  Otherwise the layout must be assumed to change at
+    every stop, and the permissions of pages in ELF files come from
+    their Program Headers, which do not reflect mprotect().
+    """
+    if not pwndbg.vmmap.proc_pid_maps():
+        return pwndbg.memory.read(address, size, partial=True)
+
+    page = pwndbg.vmmap.find(address)
+
+    if page is None or page.write or address + size > page.vaddr + page.memsz:
+        return pwndbg.memory.read(address, size, partial=True)
+
+    return read_static_code(address, size)
+
 @pwndbg.memoize.reset_on_cont
 def get_one_instruction(address):
     md   = get_disassembler(address)
     size = VariableInstructionSizeMax.get(pwndbg.arch.current, 4)
-    data = pwndbg.memory.read(address, size, partial=True)
+    data = read_code(address, size)
     for ins in md.disasm(bytes(data), address, 1):
         pwndbg.disasm.arch.DisassemblyAssistant.enhance(ins)
         return ins
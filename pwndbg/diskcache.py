@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Persistent cache for results about objfiles, which are the same
+in every session, e.g. page layouts.
+
+Results are stored in one file per objfile under ~/.cache/pwndbg,
+named after the GNU build-id of the objfile, or a hash of its contents
+if it does not have one.  Files are replaced atomically, so several
+sessions can share the cache, and the least recently used files are
+removed once the cache grows too large.
+"""
+from __future__ import print_function
+
+import atexit
+import binascii
+import errno
+import hashlib
+import marshal
+import os
+import stat
+import struct
+import sys
+import tempfile
+
+import pwndbg.elf
+import pwndbg.events
+import pwndbg.symbol
+
+#: Whether results are loaded from and saved to disk
+enabled = True
+
+#: Bumped whenever the format of any cached results changes
+VERSION = 3
+
+#: Once the cache is larger than this, the least recently used
+#: entries are removed.
+MAX_SIZE = 64 * 1024 * 1024
+
+# ELF constants
+NT_GNU_BUILD_ID = 3
+
+def directory():
+    """
+    Returns the directory which holds the cache for this version.
+    """
+    root = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+
+    # The marshal format can change between versions of Python
+    name = 'v%i-py%i.%i' % (VERSION, sys.version_info[0], sys.version_info[1])
+    return os.path.join(root, 'pwndbg', name)
+
+def build_id(path):
+    """
+    Returns the GNU build-id of the ELF file at ``path`` as a hex
+    string, or None if it does not have one.
+    """
+    ehdr, phdrs = pwndbg.elf.file_headers(path)
+
+    if ehdr is None:
+        return None
+
+    with open(path, 'rb') as f:
+        for phdr in phdrs:
+            if phdr['p_type'] != pwndbg.elf.PT_NOTE:
+                continue
+
+            align = 8 if phdr['p_align'] == 8 else 4
+
+            f.seek(phdr['p_offset'])
+            notes = f.read(phdr['p_filesz'])
+            pos   = 0
+
+            while pos + 12 <= len(notes):
+                namesz, descsz, ntype = struct.unpack_from(ehdr.endian + 'III', notes, pos)
+                pos  += 12
+                name  = notes[pos:pos+namesz]
+                pos  += (namesz + align - 1) & ~(align - 1)
+                desc  = notes[pos:pos+descsz]
+                pos  += (descsz + align - 1) & ~(align - 1)
+
+                if ntype == NT_GNU_BUILD_ID and name == b'GNU\x00':
+                    return binascii.hexlify(desc).decode()
+
+    return None
+
+def hash_file(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(0x100000), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+#: Names of the cache entries of files which were already looked at,
+#: by (path, modification time, size), so that files without a build-id
+#: are only hashed once.
+keys = {}
+
+def key(objfile):
+    """
+    Returns the name of the cache entry for the objfile at path
+    ``objfile``, or None if it cannot be cached.
+    """
+    path = pwndbg.symbol.local_path(objfile)
+
+    if not path:
+        return None
+
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+
+    if not stat.S_ISREG(st.st_mode):
+        return None
+
+    stamp = (path, st.st_mtime, st.st_size)
+
+    if stamp in keys:
+        return keys[stamp]
+
+    try:
+        name = build_id(path)
+        if name:
+            name = 'build-id-' + name
+        else:
+            name = 'sha1-' + hash_file(path)
+    except (IOError, OSError, struct.error):
+        name = None
+
+    keys[stamp] = name
+    return name
+
+def load(path):
+    """
+    Loads the cache file at ``path``, or returns an empty dictionary
+    if it does not exist or is invalid.
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = marshal.load(f)
+    except (IOError, OSError, EOFError, ValueError, TypeError):
+        return {}
+
+    if not isinstance(data, dict):
+        return {}
+
+    # Mark the file as recently used
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+    return data
+
+def store(path, data):
+    """
+    Atomically replaces the cache file at ``path`` with ``data``.
+    """
+    root = os.path.dirname(path)
+
+    try:
+        os.makedirs(root)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            return
+
+    try:
+        fd, temp = tempfile.mkstemp(dir=root, prefix='.tmp-')
+    except OSError:
+        return
+
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            marshal.dump(data, f)
+        os.rename(temp, path)
+    except (IOError, OSError, ValueError):
+        try:
+            os.unlink(temp)
+        except OSError:
+            pass
+
+def cleanup(limit=MAX_SIZE):
+    """
+    Removes the least recently used cache files until the
+    cache is no larger than ``limit`` bytes.
+    """
+    root = directory()
+
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return
+
+    files = []
+    for name in names:
+        path = os.path.join(root, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            # Removed by another session
+            continue
+        files.append((st.st_mtime, st.st_size, path))
+
+    total = sum(size for _, size, _ in files)
+
+    for _, size, path in sorted(files):
+        if total <= limit:
+            break
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        total -= size
+
+
+class Entry(object):
+    """
+    Cached results for a single objfile, grouped into sections,
+    each of which is a dictionary.
+    """
+    def __init__(self, name):
+        self.name     = name
+        self.path     = os.path.join(directory(), name)
+        self.sections = load(self.path)
+        self.new      = {} #: Results added during this session, by section
+
+    def get(self, section, key, default=None):
+        return self.sections.get(section, {}).get(key, default)
+
+    def set(self, section, key, value):
+        self.sections.setdefault(section, {})[key] = value
+        self.new.setdefault(section, {})[key] = value
+
+    def save(self):
+        """
+        Writes any new results to disk.  Returns True if anything
+        was written.
+        """
+        if not self.new:
+            return False
+
+        # Another session may have saved results for the same objfile
+        # since we loaded it, so merge our results into what is there.
+        sections = load(self.path)
+        for section, values in self.new.items():
+            sections.setdefault(section, {}).update(values)
+
+        store(self.path, sections)
+
+        self.sections = sections
+        self.new      = {}
+        return True
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__.__name__, self.name)
+
+#: Entries which have been loaded during this session, by name
+entries = {}
+
+def get(objfile):
+    """
+    Returns the Entry for the objfile at path ``objfile``, loading
+    it on first use, or None if it cannot be cached.
+
+    Only absolute paths are used, since relative paths and placeholder
+    names may not refer to the objfile.
+    """
+    if not enabled or not objfile or not os.path.isabs(objfile):
+        return None
+
+    name = key(objfile)
+
+    if name is None:
+        return None
+
+    entry = entries.get(name)
+
+    if entry is None:
+        entry = entries[name] = Entry(name)
+
+    return entry
+
+@pwndbg.events.new_objfile
+@pwndbg.events.exit
+def save():
+    saved = False
+    for entry in entries.values():
+        saved = entry.save() or saved
+
+    if saved:
+        cleanup()
+
+atexit.register(save)
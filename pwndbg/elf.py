@@ -6,47 +6,208 @@ all of the address spaces and permissions of an ELF file in memory.
 
 This is necessary for when access to /proc is restricted, or when
 working on a BSD system which simply does not have /proc.
+
+ELF structures are parsed directly from bytes, which may come from
+the memory of the inferior or from a file on disk.
 """
 from __future__ import print_function
 
-import os
-import re
-import subprocess
-import tempfile
+import struct
 
 import gdb
 import pwndbg.auxv
+import pwndbg.diskcache
 import pwndbg.events
 import pwndbg.info
 import pwndbg.memoize
 import pwndbg.memory
 import pwndbg.proc
 import pwndbg.stack
-import pwndbg.typeinfo
+import pwndbg.symbol
 
 # ELF constants
 PF_X, PF_W, PF_R = 1,2,4
 ET_EXEC, ET_DYN  = 2,3
+PT_LOAD, PT_DYNAMIC, PT_NOTE = 1,2,4
+DT_NULL          = 0
+SHT_SYMTAB, SHT_DYNSYM = 2,11
+
+# Layouts of the ELF structures for each ei_class (1 is 32-bit,
+# 2 is 64-bit), as a struct format and the names of the fields.
+Ehdr = {
+    1: ('16sHHIIIIIHHHHHH', 'e_ident e_type e_machine e_version e_entry e_phoff e_shoff e_flags '
+                            'e_ehsize e_phentsize e_phnum e_shentsize e_shnum e_shstrndx'),
+    2: ('16sHHIQQQIHHHHHH', 'e_ident e_type e_machine e_version e_entry e_phoff e_shoff e_flags '
+                            'e_ehsize e_phentsize e_phnum e_shentsize e_shnum e_shstrndx'),
+}
+Phdr = {
+    1: ('IIIIIIII', 'p_type p_offset p_vaddr p_paddr p_filesz p_memsz p_flags p_align'),
+    2: ('IIQQQQQQ', 'p_type p_flags p_offset p_vaddr p_paddr p_filesz p_memsz p_align'),
+}
+Dyn = {
+    1: ('iI', 'd_tag d_val'),
+    2: ('qQ', 'd_tag d_val'),
+}
+Shdr = {
+    1: ('IIIIIIIIII', 'sh_name sh_type sh_flags sh_addr sh_offset sh_size sh_link sh_info sh_addralign sh_entsize'),
+    2: ('IIQQQQIIQQ', 'sh_name sh_type sh_flags sh_addr sh_offset sh_size sh_link sh_info sh_addralign sh_entsize'),
+}
+Sym = {
+    1: ('IIIBBH', 'st_name st_value st_size st_info st_other st_shndx'),
+    2: ('IBBHQQ', 'st_name st_info st_other st_shndx st_value st_size'),
+}
+
+# Large enough for either ELF header
+EHDR_SIZE = 64
+
+class Header(object):
+    """
+    An ELF structure parsed from raw bytes.
+
+    Fields are looked up by name, e.g. ``ehdr['e_phoff']``, and
+    ``address`` is the address (or file offset) it was read from.
+    """
+    def __init__(self, layouts, ei_class, endian, data, offset=0, address=0):
+        fmt, names = layouts[ei_class]
+
+        self.address  = address
+        self.ei_class = ei_class
+        self.endian   = endian
+        self.values   = struct.unpack_from(endian + fmt, data, offset)
+        self.fields   = dict(zip(names.split(), self.values))
+
+    @classmethod
+    def size(cls, layouts, ei_class):
+        return struct.calcsize(layouts[ei_class][0])
+
+    def __getitem__(self, name):
+        return self.fields[name]
+
+    def __eq__(self, other):
+        return isinstance(other, Header) and (self.address, self.values) == (other.address, other.values)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self.address, self.values))
+
+    def __repr__(self):
+        return "%s(%#x, %r)" % (self.__class__.__name__, self.address, self.fields)
+
+def parse_ehdr(data, address=0):
+    """
+    Parses the ELF header at the start of ``data``.
+
+    Returns:
+        A Header, or None if ``data`` does not start with an ELF header.
+    """
+    ident = bytearray(data[:16])
+
+    if ident[:4] != b'\x7fELF' or len(ident) < 16:
+        return None
+
+    ei_class = ident[4]
+    endian   = {1: '<', 2: '>'}.get(ident[5])
+
+    if ei_class not in Ehdr or endian is None:
+        return None
+
+    if len(data) < Header.size(Ehdr, ei_class):
+        return None
+
+    return Header(Ehdr, ei_class, endian, data, 0, address)
+
+def parse_phdrs(ehdr, data, address=0):
+    """
+    Parses the Program Headers of ``ehdr`` from ``data``, which
+    starts with the Program Header table.
+
+    Returns:
+        A list of Header objects, without any which were truncated.
+    """
+    size      = Header.size(Phdr, ehdr.ei_class)
+    phentsize = ehdr['e_phentsize']
+    phdrs     = []
+
+    if phentsize < size:
+        return phdrs
+
+    for i in range(ehdr['e_phnum']):
+        offset = i * phentsize
+
+        if offset + size > len(data):
+            break
+
+        phdrs.append(Header(Phdr, ehdr.ei_class, ehdr.endian, data, offset, address + offset))
+
+    return phdrs
+
+def parse_shdrs(ehdr, data, address=0):
+    """
+    Parses the Section Headers of ``ehdr`` from ``data``, which
+    starts with the Section Header table.
 
-# In order for this file to work, we need to have symbols loaded
-# in GDB for various ELF header types.
-#
-# We can simply create an object file and load its symbols (and types!)
-# into our address space.  This should not pollute any actual symbols
-# since we don't declare any functions, and load the object file at
-# address zero.
-tempdir = tempfile.gettempdir()
-gef_elf = os.path.join(tempdir, 'pwndbg-elf')
-with open(gef_elf + '.c', 'w+') as f:
-    f.write('''#include <elf.h>
-Elf32_Ehdr a;
-Elf64_Ehdr b;
-Elf32_Phdr e;
-Elf64_Phdr f;
-''')
-    f.flush()
-
-subprocess.check_output('gcc -c -g %s.c -o %s.o' % (gef_elf, gef_elf), shell=True)
+    Returns:
+        A list of Header objects, without any which were truncated.
+    """
+    size      = Header.size(Shdr, ehdr.ei_class)
+    shentsize = ehdr['e_shentsize']
+    shdrs     = []
+
+    if shentsize < size:
+        return shdrs
+
+    for i in range(ehdr['e_shnum']):
+        offset = i * shentsize
+
+        if offset + size > len(data):
+            break
+
+        shdrs.append(Header(Shdr, ehdr.ei_class, ehdr.endian, data, offset, address + offset))
+
+    return shdrs
+
+def parse_dynamic(ehdr, data, address=0):
+    """
+    Parses the entries of a dynamic section from ``data``, up to
+    the first DT_NULL entry.
+
+    Returns:
+        A list of Header objects.
+    """
+    size    = Header.size(Dyn, ehdr.ei_class)
+    entries = []
+
+    for offset in range(0, len(data) - size + 1, size):
+        dyn = Header(Dyn, ehdr.ei_class, ehdr.endian, data, offset, address + offset)
+
+        if dyn['d_tag'] == DT_NULL:
+            break
+
+        entries.append(dyn)
+
+    return entries
+
+def file_headers(path):
+    """
+    Reads the ELF header and Program Headers of the file at ``path``.
+
+    Returns:
+        A tuple containing (Header, list of Headers), or (None, [])
+        if it is not an ELF file.
+    """
+    with open(path, 'rb') as f:
+        ehdr = parse_ehdr(f.read(EHDR_SIZE))
+
+        if ehdr is None:
+            return None, []
+
+        phoff = ehdr['e_phoff']
+        f.seek(phoff)
+        data  = f.read(ehdr['e_phnum'] * ehdr['e_phentsize'])
+
+    return ehdr, parse_phdrs(ehdr, data, phoff)
 
 @pwndbg.proc.OnlyWhenRunning
 @pwndbg.memoize.reset_on_start
@@ -96,31 +257,12 @@ def load(pointer):
 
 def get_ehdr(pointer):
     """
-    Given a pointer into an ELF module, return a list of all loaded
-    sections in the ELF.
+    Given a pointer into an ELF module, return its ELF header.
 
     Returns:
-        A tuple containing (ei_class, gdb.Value).
-        The gdb.Value object has type of either Elf32_Ehdr or Elf64_Ehdr.
-
-    Example:
-
-        >>> pwndbg.elf.load(gdb.parse_and_eval('$pc'))
-        [Page('400000-4ef000 r-xp 0'),
-         Page('6ef000-6f0000 r--p ef000'),
-         Page('6f0000-6ff000 rw-p f0000')]
-        >>> pwndbg.elf.load(0x7ffff77a2000)
-        [Page('7ffff75e7000-7ffff77a2000 r-xp 0x1bb000 0'),
-         Page('7ffff77a2000-7ffff79a2000 ---p 0x200000 1bb000'),
-         Page('7ffff79a2000-7ffff79a6000 r--p 0x4000 1bb000'),
-         Page('7ffff79a6000-7ffff79ad000 rw-p 0x7000 1bf000')]
+        A tuple containing (ei_class, Header).
+        ei_class is 1 for 32-bit and 2 for 64-bit ELF files.
     """
-    with pwndbg.events.Pause():
-        gdb.execute('add-symbol-file %s.o 0' % gef_elf, from_tty=False, to_string=True)
-
-    Elf32_Ehdr = pwndbg.typeinfo.load('Elf32_Ehdr')
-    Elf64_Ehdr = pwndbg.typeinfo.load('Elf64_Ehdr')
-
     # Align down to a page boundary, and scan until we find
     # the ELF header.
     base = pwndbg.memory.page_align(pointer)
@@ -139,55 +281,70 @@ def get_ehdr(pointer):
         else:
             print("ERROR: Could not find ELF base!")
             return None, None
+
+        ehdr = parse_ehdr(pwndbg.memory.read(base, EHDR_SIZE), base)
     except gdb.MemoryError:
         return None, None
 
-    # Determine whether it's 32- or 64-bit
-    ei_class = pwndbg.memory.byte(base+4)
+    if ehdr is None:
+        return None, None
 
-    # Find out where the section headers start
-    EhdrType = { 1: Elf32_Ehdr, 2: Elf64_Ehdr }[ei_class]
-    Elfhdr   = pwndbg.memory.poi(EhdrType, base)
-    return ei_class, Elfhdr
+    return ehdr.ei_class, ehdr
 
-def get_phdrs(pointer):
+def read_phdrs(ehdr):
     """
-    Returns a tuple containing (phnum, phentsize, gdb.Value),
-    where the gdb.Value object is an ELF Program Header with
-    the architecture-appropriate structure type.
+    Returns a list of the Program Headers of ``ehdr``, which
+    is an ELF header in memory.
     """
-    ei_class, Elfhdr = get_ehdr(pointer)
+    if not ehdr:
+        return []
 
-    if Elfhdr is None:
-        return (0, 0, None)
+    address = ehdr.address + ehdr['e_phoff']
 
-    Elf32_Phdr = pwndbg.typeinfo.load('Elf32_Phdr')
-    Elf64_Phdr = pwndbg.typeinfo.load('Elf64_Phdr')
-    PhdrType   = { 1: Elf32_Phdr, 2: Elf64_Phdr }[ei_class]
+    try:
+        data = pwndbg.memory.read(address, ehdr['e_phnum'] * ehdr['e_phentsize'])
+    except gdb.MemoryError:
+        return []
 
-    phnum     = int(Elfhdr['e_phnum'])
-    phoff     = int(Elfhdr['e_phoff'])
-    phentsize = int(Elfhdr['e_phentsize'])
+    return parse_phdrs(ehdr, data, address)
 
-    x = (phnum, phentsize, pwndbg.memory.poi(PhdrType, int(Elfhdr.address) + phoff))
-    return x
+def get_phdrs(pointer):
+    """
+    Given a pointer into an ELF module, return a list of
+    its Program Headers.
+    """
+    ei_class, ehdr = get_ehdr(pointer)
+    return read_phdrs(ehdr)
 
 def iter_phdrs(ehdr):
-    if not ehdr:
-        raise StopIteration
+    for phdr in read_phdrs(ehdr):
+        yield phdr
+
+def iter_dynamic(ehdr):
+    """
+    Yields the entries of the dynamic section of ``ehdr``, which is an
+    ELF header in memory, e.g. to find DT_DEBUG.
+    """
+    for phdr in read_phdrs(ehdr):
+        if phdr['p_type'] != PT_DYNAMIC:
+            continue
 
-    phnum, phentsize, phdr = get_phdrs(int(ehdr.address))
+        address = phdr['p_vaddr']
 
-    if not phdr:
-        raise StopIteration
+        # Relocatable / type DYN binaries are loaded at the base
+        # address that we discovered.
+        if ehdr['e_type'] == ET_DYN:
+            address += ehdr.address
+
+        try:
+            data = pwndbg.memory.read(address, phdr['p_memsz'], partial=True)
+        except gdb.MemoryError:
+            return
 
-    first_phdr = int(phdr.address)
-    PhdrType   = phdr.type
+        for dyn in parse_dynamic(ehdr, data, address):
+            yield dyn
 
-    for i in range(0, phnum):
-        p_phdr = int(first_phdr + (i*phentsize))
-        p_phdr = pwndbg.memory.poi(PhdrType, p_phdr)
-        yield p_phdr
+        return
 
 def map(pointer, objfile=''):
     """
@@ -212,80 +369,145 @@ def map(pointer, objfile=''):
     ei_class, ehdr         = get_ehdr(pointer)
     return map_inner(ei_class, ehdr, objfile)
 
-@pwndbg.memoize.reset_on_objfile
+@pwndbg.memoize.reset_on_objfile(maxsize=256)
 def map_inner(ei_class, ehdr, objfile):
     if not ehdr:
         return []
 
-    base = int(ehdr.address)
+    # The layout only depends on the file, so it can be kept on disk
+    entry  = disk_entry(ehdr, objfile)
+    layout = entry.get('elf', 'layout') if entry else None
 
+    if layout is None:
+        layout = get_layout(ehdr)
+        if entry:
+            entry.set('elf', 'layout', layout)
+
+    pages = [pwndbg.memory.Page(*fields) for fields in layout]
+
+    # Adjust against the base address that we discovered
+    # for binaries that are relocatable / type DYN.
+    if ET_DYN == ehdr['e_type']:
+        base = ehdr.address
+        for page in pages:
+            page.vaddr += base
+
+    for page in pages:
+        page.objfile = objfile
+
+    return tuple(pages)
+
+def disk_entry(ehdr, objfile):
+    """
+    Returns the pwndbg.diskcache entry for ``objfile``, or None if it
+    is not a file on disk whose ELF header is the same as ``ehdr``.
+    """
+    entry = pwndbg.diskcache.get(objfile)
+
+    if entry is None:
+        return None
+
+    try:
+        header, _ = file_headers(pwndbg.symbol.local_path(objfile))
+    except (IOError, OSError):
+        return None
+
+    if header is None or header.values != ehdr.values:
+        return None
+
+    return entry
+
+def get_layout(ehdr):
+    """
+    Returns the pages described by the Program Headers of ``ehdr``,
+    before relocation, as sorted ``(vaddr, memsz, flags, offset)`` tuples.
+    """
     # For each Program Header which would load data into our
-    # address space, create a representation of each individual
-    # page and its permissions.
+    # address space, add its range of pages and their permissions.
     #
     # Entries are processed in-order so that later entries
     # which change page permissions (e.g. PT_GNU_RELRO) will
     # override their small subset of address space.
-    pages = []
+    segments = []
     for phdr in iter_phdrs(ehdr):
-        memsz   = int(phdr['p_memsz'])
+        memsz   = phdr['p_memsz']
 
         if not memsz:
             continue
 
-        vaddr   = int(phdr['p_vaddr'])
-        offset  = int(phdr['p_offset'])
-        flags   = int(phdr['p_flags'])
-        ptype   = int(phdr['p_type'])
+        vaddr   = phdr['p_vaddr']
+        offset  = phdr['p_offset']
+        flags   = phdr['p_flags']
 
         memsz += pwndbg.memory.page_offset(vaddr)
         memsz  = pwndbg.memory.page_size_align(memsz)
         vaddr  = pwndbg.memory.page_align(vaddr)
         offset = pwndbg.memory.page_align(offset)
 
-        # For each page described by this program header
-        for page_addr in range(vaddr, vaddr+memsz, pwndbg.memory.PAGE_SIZE):
-            if page_addr in pages:
-                page = pages[pages.index(page_addr)]
-
-                # Don't ever remove the execute flag.
-                # Sometimes we'll load a read-only area into .text
-                # and the loader doesn't actually *remove* the executable flag.
-                if page.flags & PF_X: flags |= PF_X
-                page.flags = flags
-            else:
-                page = pwndbg.memory.Page(page_addr, pwndbg.memory.PAGE_SIZE, flags, offset + (page_addr-vaddr))
-                pages.append(page)
-
-    # Adjust against the base address that we discovered
-    # for binaries that are relocatable / type DYN.
-    if ET_DYN == int(ehdr['e_type']):
-        for page in pages:
-            page.vaddr += base
+        segments = overlay(segments, vaddr, vaddr+memsz, flags, offset)
 
     # Merge contiguous sections of memory together
-    pages.sort()
-    prev = pages[0]
-    for page in list(pages[1:]):
-        if (prev.flags & PF_W) == (page.flags & PF_W) and prev.vaddr+prev.memsz == page.vaddr:
-            prev.memsz += page.memsz
-            pages.remove(page)
-        else:
-            prev = page
+    merged = []
+    for start, end, flags, offset in segments:
+        if merged:
+            prev = merged[-1]
+            if (prev[2] & PF_W) == (flags & PF_W) and prev[1] == start:
+                merged[-1] = (prev[0], end, prev[2], prev[3])
+                continue
+        merged.append((start, end, flags, offset))
 
     # Fill in any gaps with no-access pages.
     # This is what the linker does, and what all the '---p' pages are.
-    gaps = []
-    for i in range(len(pages)-1):
-        a, b    = pages[i:i+2]
-        a_end   = (a.vaddr + a.memsz)
-        b_begin = b.vaddr
-        if a_end != b_begin:
-            gaps.append(pwndbg.memory.Page(a_end, b_begin-a_end, 0, b.offset))
+    layout = []
+    for i, (start, end, flags, offset) in enumerate(merged):
+        if i and merged[i-1][1] != start:
+            prev_end = merged[i-1][1]
+            layout.append((prev_end, start-prev_end, 0, offset))
+        layout.append((start, end-start, flags, offset))
 
-    pages.extend(gaps)
+    return tuple(layout)
 
-    for page in pages:
-        page.objfile = objfile
+def overlay(segments, start, end, flags, offset):
+    """
+    Adds the address range ``start`` to ``end`` of a Program Header to
+    ``segments``, a sorted list of non-overlapping ``(start, end, flags,
+    offset)`` ranges, and returns the new list.
+
+    Ranges which overlap are split.  The overlapping part takes on
+    ``flags`` but keeps its original file offset.
+    """
+    result  = []
+    address = start # Everything in the new range before this is done
+
+    for s, e, f, o in segments:
+        # Does not overlap the new range
+        if e <= start or end <= s:
+            if end <= s and address < end:
+                result.append((address, end, flags, offset + address - start))
+                address = end
+            result.append((s, e, f, o))
+            continue
+
+        if s < start:
+            result.append((s, start, f, o))
+
+        if address < s:
+            result.append((address, s, flags, offset + address - start))
+
+        # Don't ever remove the execute flag.
+        # Sometimes we'll load a read-only area into .text
+        # and the loader doesn't actually *remove* the executable flag.
+        # This also applies to the rest of the new range.
+        if f & PF_X: flags |= PF_X
+
+        lo, hi  = max(s, start), min(e, end)
+        address = hi
+        result.append((lo, hi, flags, o + lo - s))
+
+        if end < e:
+            result.append((end, e, f, o + end - s))
+
+    if address < end:
+        result.append((address, end, flags, offset + address - start))
 
-    return tuple(sorted(pages))
+    return result
@@ -7,6 +7,8 @@ by using a decorator.
 """
 import functools
 import sys
+import threading
+import timeit
 import traceback
 
 import gdb
@@ -15,6 +17,19 @@ import pwndbg.stdio
 debug = False
 pause = 0
 
+#: Whether to collect statistics about each handler.
+#: See get_stats() and the events-stats command.
+stats = False
+
+#: Print a warning for any handler which takes longer than this
+#: many seconds.  None disables the warning.
+slow = None
+
+#: new_objfile handlers run once no new objfiles have been loaded for
+#: this many seconds, if the inferior has not stopped before then.
+#: None means they only run when the inferior stops.
+objfile_quiet = 0.25
+
 
 # There is no GDB way to get a notification when the binary itself
 # is loaded from disk, by the operating system, before absolutely
@@ -41,6 +56,9 @@ class StartEvent(object):
 
         self.running = True
 
+        # Let the new_objfile handlers see the new objfile first
+        gdb.events.new_objfiles.flush()
+
         for function in self.registered:
             function()
 
@@ -49,14 +67,74 @@ class StartEvent(object):
 
 gdb.events.start = StartEvent()
 
+# Libraries are often loaded in bursts, e.g. gdbserver reports every
+# shared object at once.  Rather than running all of the new_objfile
+# handlers for each of them, they are run once for each burst: before
+# the inferior stops, starts or exits, or after a quiet period.
+class ObjfilesEvent(object):
+    def __init__(self):
+        self.registered = list()
+        self.pending    = False
+        self.timer      = None
+    def connect(self, function):
+        if function not in self.registered:
+            self.registered.append(function)
+    def disconnect(self, function):
+        if function in self.registered:
+            self.registered.remove(function)
+    def on_new_objfile(self):
+        self.pending = True
+
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+        if objfile_quiet is not None:
+            self.timer = threading.Timer(objfile_quiet, gdb.post_event, (self.on_quiet,))
+            self.timer.daemon = True
+            self.timer.start()
+
+    def on_quiet(self):
+        # Handlers cannot inspect a running inferior, so
+        # wait until it stops.
+        thread = gdb.selected_thread()
+        if thread is not None and thread.is_running():
+            return
+        self.flush()
+
+    def flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+        if not self.pending:
+            return
+
+        self.pending = False
+
+        for function in self.registered:
+            function()
+
+gdb.events.new_objfiles = ObjfilesEvent()
+
 # In order to support reloading, we must be able to re-fire
 # all 'objfile' and 'stop' events.
 registered = {gdb.events.exited: [],
               gdb.events.cont: [],
               gdb.events.new_objfile: [],
+              gdb.events.new_objfiles: [],
               gdb.events.stop: [],
               gdb.events.start: []}
 
+# Older versions of GDB do not notify us of memory changes made by
+# the user (e.g. via "set var"), so this event is optional.
+if hasattr(gdb.events, 'memory_changed'):
+    registered[gdb.events.memory_changed] = []
+
+# Likewise for registers changed by the user (e.g. via "set $rax=1").
+if hasattr(gdb.events, 'register_changed'):
+    registered[gdb.events.register_changed] = []
+
 class Pause(object):
     def __enter__(self, *a, **kw):
         global pause
@@ -71,15 +149,121 @@ class Pause(object):
 # this session, and only emit objfile events for each *new* file.
 objfile_cache = set()
 
-def connect(func, event_handler, name=''):
-    if debug:
-        print("Connecting", func.__name__, event_handler)
+class Handler(object):
+    """
+    A function connected to an event, and statistics about it.
+
+    Handlers run in order of ``priority`` (lowest first), and after
+    any of the functions in ``after`` which are connected to the same
+    event.  If ``inputs`` is given, it is called before the handler,
+    which is skipped if the result is the same as last time.
+    """
+    def __init__(self, func, event, priority=0, after=(), inputs=None):
+        self.func     = func
+        self.name     = func.__module__ + '.' + func.__name__
+        self.event    = event
+        self.priority = priority
+        self.after    = tuple(after)
+        self.inputs   = inputs
+        self.last     = None #: Result of ``inputs`` the last time it ran
+        self.reset()
+
+    def reset(self):
+        self.calls      = 0
+        self.skipped    = 0
+        self.exceptions = 0
+        self.time       = 0.0
+        self.max        = 0.0
+
+    def changed(self):
+        """
+        Returns whether the inputs of the handler changed since it
+        last ran.  Handlers without inputs have always changed.
+        """
+        if self.inputs is None:
+            return True
+
+        try:
+            current = self.inputs()
+        except gdb.error:
+            self.last = None
+            return True
+
+        if self.last is not None and current == self.last:
+            return False
+
+        self.last = current
+        return True
+
+    def run(self):
+        """
+        Calls the handler, recording statistics if they are enabled.
+        """
+        timed = stats or slow is not None
+        if timed:
+            start = timeit.default_timer()
+
+        try:
+            return self.func()
+        except Exception:
+            if stats:
+                self.exceptions += 1
+            raise
+        finally:
+            if timed:
+                elapsed = timeit.default_timer() - start
+
+                if stats:
+                    self.calls += 1
+                    self.time  += elapsed
+                    self.max    = max(self.max, elapsed)
 
-    @functools.wraps(func)
-    def caller(*a):
-        if debug:
-            sys.stdout.write('%r %s.%s %r\n' % (name, func.__module__, func.__name__, a))
+                if slow is not None and elapsed > slow:
+                    print("Warning: %s handler %s took %.3fs" % (self.event, self.name, elapsed))
 
+#: Statistics for every connected handler
+handlers = []
+
+#: The single function connected to each GDB event, which runs
+#: all of the handlers for that event.
+dispatchers = {}
+
+#: Handlers for each event in the order that they run.  Recomputed
+#: whenever a handler is connected.
+order = {}
+
+def ordered(event_handler):
+    """
+    Returns the handlers for ``event_handler`` sorted by priority and
+    then by the order they were connected, except that each handler
+    comes after the handlers it depends on.
+    """
+    result = order.get(event_handler)
+
+    if result is not None:
+        return result
+
+    connected = registered[event_handler]
+    remaining = list(connected)
+    result    = []
+
+    while remaining:
+        pending = set(h.func for h in remaining)
+        ready   = [h for h in remaining if not pending.intersection(h.after)]
+
+        # Dependency cycle, fall back to priorities
+        if not ready:
+            ready = remaining
+
+        handler = min(ready, key=lambda h: (h.priority, connected.index(h)))
+        remaining.remove(handler)
+        result.append(handler)
+
+    order[event_handler] = result
+    return result
+
+def dispatch(event_handler, name):
+    def dispatcher(*a):
         if a and isinstance(a[0], gdb.NewObjFileEvent):
             objfile = a[0].new_objfile
             path = objfile.filename
@@ -93,40 +277,157 @@ def connect(func, event_handler, name=''):
 
         if pause: return
         with pwndbg.stdio.stdio:
-            try:
-                func()
-            except Exception as e:
-                traceback.print_exc()
-                raise e
-
-    registered[event_handler].append(caller)
-    event_handler.connect(caller)
+            for handler in ordered(event_handler):
+                if debug:
+                    sys.stdout.write('%r %s %r\n' % (name, handler.name, a))
+
+                if not handler.changed():
+                    if stats:
+                        handler.skipped += 1
+                    continue
+
+                try:
+                    handler.run()
+                except Exception:
+                    handler.last = None
+                    traceback.print_exc()
+
+    return dispatcher
+
+def connect(func, event_handler, name='', priority=0, after=(), inputs=None):
+    # Allow the decorators to be used with arguments
+    if func is None:
+        return functools.partial(connect, event_handler=event_handler, name=name,
+                                 priority=priority, after=after, inputs=inputs)
+
+    if debug:
+        print("Connecting", func.__name__, event_handler)
+
+    # Each function runs at most once per event
+    if any(h.func is func for h in registered[event_handler]):
+        return func
+
+    handler = Handler(func, name, priority, after, inputs)
+    handlers.append(handler)
+    registered[event_handler].append(handler)
+    order.pop(event_handler, None)
+
+    if event_handler not in dispatchers:
+        dispatchers[event_handler] = dispatch(event_handler, name)
+        event_handler.connect(dispatchers[event_handler])
+
     return func
 
-def exit(func):        return connect(func, gdb.events.exited, 'exit')
-def cont(func):        return connect(func, gdb.events.cont, 'cont')
-def new_objfile(func): return connect(func, gdb.events.new_objfile, 'obj')
-def stop(func):        return connect(func, gdb.events.stop, 'stop')
-def start(func):       return connect(func, gdb.events.start, 'start')
+def exit(func=None, **kw):        return connect(func, gdb.events.exited, 'exit', **kw)
+def cont(func=None, **kw):        return connect(func, gdb.events.cont, 'cont', **kw)
+def new_objfile(func=None, **kw): return connect(func, gdb.events.new_objfiles, 'obj', **kw)
+def stop(func=None, **kw):        return connect(func, gdb.events.stop, 'stop', **kw)
+def start(func=None, **kw):       return connect(func, gdb.events.start, 'start', **kw)
+
+def memory_changed(func=None, **kw):
+    if hasattr(gdb.events, 'memory_changed'):
+        return connect(func, gdb.events.memory_changed, 'memory_changed', **kw)
+    return func or (lambda func: func)
+
+def register_changed(func=None, **kw):
+    if hasattr(gdb.events, 'register_changed'):
+        return connect(func, gdb.events.register_changed, 'register_changed', **kw)
+    return func or (lambda func: func)
+
+class Lazy(object):
+    """
+    A handler which the events only mark as dirty.  It is run the
+    next time it is called, which consumers of its results must do
+    before using them.  Calling it again is cheap until the next event.
+    """
+    def __init__(self, func):
+        self.func    = func
+        self.dirty   = True
+        self.handler = Handler(func, 'lazy')
+        handlers.append(self.handler)
+        functools.update_wrapper(self, func)
+
+    def __call__(self):
+        if self.dirty:
+            self.dirty = False
+            self.handler.run()
+
+    def mark(self):
+        self.dirty = True
+
+def lazy(*events):
+    """
+    Makes a handler lazy for each of ``events``, e.g.
+
+        @pwndbg.events.lazy(pwndbg.events.stop)
+        def update(): ...
+
+    Handlers which must run immediately should use the events directly.
+    """
+    def decorator(func):
+        handler = Lazy(func)
+
+        @functools.wraps(func)
+        def mark():
+            handler.mark()
+
+        for event in events:
+            event(mark)
+
+        return handler
+    return decorator
 
 def after_reload():
     return
     # if gdb.selected_inferior().pid:
-    #     for f in registered[gdb.events.new_objfile]:
-    #         f()
-    #     for f in registered[gdb.events.stop]:
-    #         f()
+    #     for h in registered[gdb.events.new_objfile]:
+    #         h.func()
+    #     for h in registered[gdb.events.stop]:
+    #         h.func()
 
 def on_reload():
-    for event, functions in registered.items():
-        for function in functions:
-            event.disconnect(function)
+    for event, dispatcher in dispatchers.items():
+        event.disconnect(dispatcher)
+    for event in registered:
         registered[event] = []
+    dispatchers.clear()
+    order.clear()
+    del handlers[:]
+
+def get_stats():
+    """
+    Returns a list of dictionaries, one for each handler, with the
+    statistics collected while ``stats`` was enabled.
+
+    Time is wall-clock time, in seconds.
+    """
+    return [{'name':       h.name,
+             'event':      h.event,
+             'calls':      h.calls,
+             'skipped':    h.skipped,
+             'exceptions': h.exceptions,
+             'time':       h.time,
+             'max':        h.max} for h in handlers]
+
+def reset_stats():
+    for h in handlers:
+        h.reset()
+
+# These must see every new objfile as soon as it is loaded
+def _queue_newobjfile():
+    gdb.events.new_objfiles.on_new_objfile()
 
-@new_objfile
 def _start_newobjfile():
     gdb.events.start.on_new_objfile()
 
+connect(_queue_newobjfile, gdb.events.new_objfile, 'obj')
+connect(_start_newobjfile, gdb.events.new_objfile, 'obj')
+
+@stop
+@exit(priority=-2)
+def _flush_newobjfiles():
+    gdb.events.new_objfiles.flush()
+
 @stop
 def _start_stop():
     gdb.events.start.on_stop()
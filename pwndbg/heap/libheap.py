@@ -27,6 +27,8 @@ import sys
 import struct
 from os import uname
 
+import pwndbg.memory
+
 # bash color support
 color_support = True
 if color_support:
@@ -319,6 +321,23 @@ def mutex_unlock(ar_ptr, inferior=None):
     ar_ptr.mutex = 0
     inferior.write_memory(ar_ptr.address, struct.pack("<I", ar_ptr.mutex))
 
+class Inferior(object):
+    """
+    Wraps a gdb.Inferior so that memory accesses go through pwndbg.memory,
+    and are served as views out of its page cache.
+    """
+    def __init__(self, inferior):
+        self.inferior = inferior
+
+    def read_memory(self, address, length):
+        return pwndbg.memory.read(address, length, view=True)
+
+    def write_memory(self, address, buf):
+        pwndbg.memory.write(address, buf)
+
+    def __getattr__(self, attr):
+        return getattr(self.inferior, attr)
+
 def get_inferior():
     try:
         if len(gdb.inferiors()) == 0:
@@ -326,7 +345,7 @@ def get_inferior():
             return -1
         else:
             inferior = gdb.inferiors()[0]
-            return inferior
+            return Inferior(inferior)
     except AttributeError:
         print(c_error + "This gdb's python support is too old." + c_none)
         exit()
@@ -3,18 +3,17 @@
 """
 Hexdump implementation, ~= stolen from pwntools.
 """
-import copy
 import string
 
 import pwndbg.color
 
 
 def groupby(array, count, fill=None):
-    array = copy.copy(array)
-    while fill and len(array) % count:
-        array.append(fill)
     for i in range(0, len(array), count):
-        yield array[i:i+count]
+        group = array[i:i+count]
+        if fill and len(group) < count:
+            group = list(group) + [fill] * (count - len(group))
+        yield group
 
 #
 # We want to colorize the hex characters
@@ -42,11 +41,17 @@ for c in bytearray((string.ascii_letters + string.digits + string.punctuation).e
 printable[-1] = ' '
 
 def hexdump(data, address = 0, width = 16, skip = True):
-    data = list(bytearray(data))
+    """
+    Yields the lines of a hexdump of ``data``, which may be any object
+    supporting the buffer protocol (e.g. a memoryview from pwndbg.memory).
+    """
+    data = memoryview(data)
     base = address
     last_line = None
     skipping  = False
-    for i, line in enumerate(groupby(data, width, -1)):
+    for i, offset in enumerate(range(0, len(data), width)):
+        line = bytearray(data[offset:offset+width])
+
         if skip and line == last_line:
             if not skipping:
                 skipping = True
@@ -56,6 +61,9 @@ def hexdump(data, address = 0, width = 16, skip = True):
             skipping  = False
             last_line = line
 
+        if len(line) < width:
+            line = list(line) + [-1] * (width - len(line))
+
         hexline = []
 
         if address:
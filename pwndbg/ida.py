@@ -99,7 +99,7 @@ def Comment(addr):
 
 @withIDA
 @takes_address
-@pwndbg.memoize.reset_on_objfile
+@pwndbg.memoize.reset_on_objfile(maxsize=16384)
 def Name(addr):
     return _ida.Name(addr)
 
@@ -157,8 +157,14 @@ def GetBptEA(i):
 
 _breakpoints=[]
 
+# Breakpoints only matter once execution continues, so they are
+# synchronized on the first continue after each stop.  The process
+# can also exit and be started again without stopping, so they are
+# always synchronized then.
+@pwndbg.events.start
+@pwndbg.events.exit
 @pwndbg.events.cont
-@pwndbg.events.stop
+@pwndbg.events.lazy(pwndbg.events.stop, pwndbg.events.start, pwndbg.events.exit)
 @withIDA
 def UpdateBreakpoints():
     # XXX: Remove breakpoints from IDA when the user removes them.
@@ -4,6 +4,10 @@
 Caches return values until some event in the inferior happens,
 e.g. execution stops because of a SIGINT or breakpoint, or a
 new library/objfile are loaded, etc.
+
+Caches which only depend on part of the state of the inferior can
+instead use ``reset_on_change``, and are only reset when one of the
+generations they depend on is bumped.
 """
 from __future__ import print_function
 
@@ -11,25 +15,96 @@ import collections
 import copy
 import functools
 import sys
+import timeit
 
 import gdb
+import pwndbg.compat
 import pwndbg.events
 
 debug = False
 
+#: Whether to collect statistics about each cache.
+#: See get_stats() and the memoize-stats command.
+stats = False
+
+#: Generation counters for each kind of state which a cache can depend
+#: on.  A counter is bumped whenever that state may have changed.
+generations = {
+    'regs':     0, # Register values
+    'writes':   0, # Memory written by the debugger
+    'maps':     0, # The layout of the address space
+    'objfiles': 0, # Loaded objfiles
+}
+
+#: Watch points, which decide whether a generation needs to be bumped.
+#: Each is a function which returns True if the state has changed
+#: since it was last called.
+watchers = {}
+
+#: Generations whose watch points must be checked before they are used.
+stale = set()
+
+def bump(*names):
+    for name in names:
+        generations[name] += 1
+
+def generation(name):
+    """
+    Returns the current generation of ``name``, running its watch
+    point first if anything has happened since it was last checked.
+    """
+    if name in stale:
+        stale.discard(name)
+        if watchers[name]():
+            bump(name)
+    return generations[name]
+
+def watch(name, function):
+    """
+    Registers ``function`` as the watch point for generation ``name``.
+
+    Watch points are run lazily, at most once per stop, when a cache
+    which depends on them is used.
+    """
+    watchers[name] = function
+    stale.add(name)
+
 class memoize(object):
+    """
+    Base class for the memoizing decorators below.
+
+    By default a cache grows without bound until it is reset.  Caches
+    can be bounded by the number of entries and/or the approximate
+    number of bytes held, in which case the least recently used entries
+    are evicted first:
+
+        @pwndbg.memoize.reset_on_objfile(maxsize=4096)
+        def get(address): ...
+
+    The bounds can also be changed later with ``resize``.
+    """
     caching = True
 
-    def __init__(self, func):
+    def __new__(cls, func=None, **kwargs):
+        # Allow the decorator to be used with arguments
+        if func is None:
+            return functools.partial(cls, **kwargs)
+        return super(memoize, cls).__new__(cls)
+
+    def __init__(self, func, maxsize=None, maxbytes=None):
         self.func  = func
         self.cache = {}
+        self.sizes = {}
+        self.bytes = 0
+        self.reset_stats()
+        self.resize(maxsize, maxbytes)
         self.caches.append(self)
         functools.update_wrapper(self, func)
 
     def __call__(self, *args, **kwargs):
         how = None
 
-        if not isinstance(args, collections.Hashable):
+        if not isinstance(args, pwndbg.compat.Hashable):
             print("Cannot memoize %r!", file=sys.stderr)
             how   = "Not memoizeable!"
             value = self.func(*args)
@@ -38,11 +113,32 @@ class memoize(object):
             how   = "Cached"
             value = self.cache[args]
 
+            if stats:
+                self.hits += 1
+
+            # Mark as most recently used
+            if self.bounded:
+                del self.cache[args]
+                self.cache[args] = value
+
         else:
             how   = "Executed"
-            value = self.func(*args, **kwargs)
+
+            if stats:
+                start  = timeit.default_timer()
+                value  = self.func(*args, **kwargs)
+                self.time       += timeit.default_timer() - start
+                self.executions += 1
+                if self.caching:
+                    self.misses += 1
+            else:
+                value = self.func(*args, **kwargs)
+
             self.cache[args] = value
 
+            if self.bounded:
+                self.evict(args, value)
+
             if isinstance(value, list):
                 print("Shouldnt cache mutable types! %r" % self.func.__name__)
 
@@ -52,35 +148,94 @@ class memoize(object):
         return value
 
     def __repr__(self):
-        funcname = self.func.__module__ + '.' + self.func.__name__
-        return "<%s-memoized function %s>" % (self.kind, funcname)
+        return "<%s-memoized function %s>" % (self.kind, self.name)
 
     def __get__(self, obj, objtype):
         return functools.partial(self.__call__, obj)
 
+    @property
+    def name(self):
+        return self.func.__module__ + '.' + self.func.__name__
+
+    def reset_stats(self):
+        self.hits       = 0
+        self.misses     = 0
+        self.executions = 0
+        self.time       = 0.0
+
+    @property
+    def bounded(self):
+        return self.maxsize is not None or self.maxbytes is not None
+
+    def resize(self, maxsize=None, maxbytes=None):
+        """
+        Sets the maximum number of entries and approximate number of
+        bytes held by the cache.  None means unbounded.
+        """
+        self.maxsize  = maxsize
+        self.maxbytes = maxbytes
+
+        if self.bounded and not isinstance(self.cache, collections.OrderedDict):
+            self.cache = collections.OrderedDict(self.cache)
+
+        # Sizes are only kept while there is a limit on them, so they
+        # have to be worked out for the entries which are already there.
+        if maxbytes is None:
+            self.sizes.clear()
+        else:
+            self.sizes = dict((args, self.sizeof(args, value)) for args, value in self.cache.items())
+
+        self.bytes = sum(self.sizes.values())
+        self.evict()
+
+    @staticmethod
+    def sizeof(args, value):
+        return sys.getsizeof(args) + sys.getsizeof(value)
+
+    def evict(self, args=None, value=None):
+        """
+        Accounts for a new entry ``args``, and evicts the least
+        recently used entries until the cache is within its bounds.
+        """
+        if args is not None and self.maxbytes is not None:
+            size = self.sizeof(args, value)
+            self.bytes -= self.sizes.get(args, 0)
+            self.bytes += size
+            self.sizes[args] = size
+
+        while self.cache and ((self.maxsize is not None and len(self.cache) > self.maxsize)
+                              or (self.maxbytes is not None and self.bytes > self.maxbytes)):
+            oldest, _ = self.cache.popitem(last=False)
+            self.bytes -= self.sizes.pop(oldest, 0)
+
     def clear(self):
         if debug:
             print("Clearing %s %r" % (self, self.cache))
         self.cache.clear()
+        self.sizes.clear()
+        self.bytes = 0
 
 
 
+# Caches are reset before any other event handlers run (see the
+# ``priority`` of the handlers below), so no handler sees stale values.
+
 class reset_on_stop(memoize):
     caches = []
     kind   = 'stop'
 
     @staticmethod
-    @pwndbg.events.stop
+    @pwndbg.events.stop(priority=-1)
     def __reset():
         for obj in reset_on_stop.caches:
-            obj.cache.clear()
+            obj.clear()
 
 class reset_on_exit(memoize):
     caches = []
     kind   = 'exit'
 
     @staticmethod
-    @pwndbg.events.exit
+    @pwndbg.events.exit(priority=-1)
     def __reset():
         for obj in reset_on_exit.caches:
             obj.clear()
@@ -90,7 +245,7 @@ class reset_on_objfile(memoize):
     kind   = 'objfile'
 
     @staticmethod
-    @pwndbg.events.new_objfile
+    @pwndbg.events.new_objfile(priority=-1)
     def __reset():
         for obj in reset_on_objfile.caches:
             obj.clear()
@@ -100,8 +255,8 @@ class reset_on_start(memoize):
     kind   = 'start'
 
     @staticmethod
-    @pwndbg.events.stop
-    @pwndbg.events.start
+    @pwndbg.events.stop(priority=-1)
+    @pwndbg.events.start(priority=-1)
     def __reset():
         for obj in reset_on_start.caches:
             obj.clear()
@@ -111,26 +266,102 @@ class reset_on_cont(memoize):
     kind   = 'cont'
 
     @staticmethod
-    @pwndbg.events.cont
+    @pwndbg.events.cont(priority=-1)
     def __reset():
         for obj in reset_on_cont.caches:
             obj.clear()
 
 
+class reset_on_change(memoize):
+    """
+    Caches values until any of the generations in ``depends`` change:
+
+        @pwndbg.memoize.reset_on_change(depends=('maps',))
+        def find(address): ...
+    """
+    caches = []
+    kind   = 'change'
+
+    def __init__(self, func, depends=(), **kwargs):
+        self.depends = tuple(depends)
+        self.stamp   = None
+        super(reset_on_change, self).__init__(func, **kwargs)
+
+    def __call__(self, *args, **kwargs):
+        stamp = tuple(generation(name) for name in self.depends)
+        if stamp != self.stamp:
+            self.clear()
+            self.stamp = stamp
+        return super(reset_on_change, self).__call__(*args, **kwargs)
+
+    @staticmethod
+    @pwndbg.events.stop(priority=-1)
+    @pwndbg.events.cont(priority=-1)
+    def __resume():
+        bump('regs')
+        stale.update(watchers)
+
+    @staticmethod
+    @pwndbg.events.start(priority=-1)
+    @pwndbg.events.exit(priority=-1)
+    @pwndbg.events.new_objfile(priority=-1)
+    def __reload():
+        bump('regs', 'objfiles')
+        stale.update(watchers)
+
+    @staticmethod
+    @pwndbg.events.memory_changed(priority=-1)
+    def __memory_changed():
+        bump('writes')
+
+    @staticmethod
+    @pwndbg.events.register_changed(priority=-1)
+    def __register_changed():
+        bump('regs')
+
+
 class while_running(memoize):
     caches = []
     kind   = 'running'
     caching = False
 
     @staticmethod
-    @pwndbg.events.start
+    @pwndbg.events.start(priority=-1)
     def __start_caching():
         while_running.caching = True
 
     @staticmethod
-    @pwndbg.events.exit
+    @pwndbg.events.exit(priority=-1)
     def __reset():
         for obj in while_running.caches:
             obj.clear()
         while_running.caching = False
 
+
+def all_caches():
+    """
+    Returns every memoized function, of every kind.
+    """
+    for kind in memoize.__subclasses__():
+        for obj in kind.caches:
+            yield obj
+
+def get_stats():
+    """
+    Returns a list of dictionaries, one for each memoized function,
+    with the statistics collected while ``stats`` was enabled.
+
+    Execution time is cumulative, and includes the time spent in any
+    other memoized functions which were called.
+    """
+    return [{'name':       obj.name,
+             'kind':       obj.kind,
+             'hits':       obj.hits,
+             'misses':     obj.misses,
+             'executions': obj.executions,
+             'time':       obj.time,
+             'entries':    len(obj.cache)} for obj in all_caches()]
+
+def reset_stats():
+    for obj in all_caches():
+        obj.reset_stats()
@@ -3,57 +3,382 @@
 """
 Reading, writing, and describing memory.
 """
+import errno
+import os
+import struct
+import traceback
+
 import gdb
 import pwndbg.arch
 import pwndbg.compat
+import pwndbg.events
+import pwndbg.memoize
+import pwndbg.proc
+import pwndbg.remote
 import pwndbg.typeinfo
-import traceback
 
 PAGE_SIZE = 0x1000
 PAGE_MASK = ~(PAGE_SIZE-1)
 MMAP_MIN_ADDR = 0x8000
 
-def read(addr, count, partial=False):
-    result = ''
+#: Whether reads are served out of the page cache.
+caching = True
+
+#: Page-aligned cache of inferior memory, valid only while the
+#: inferior is stopped.  Maps page address to a bytearray of PAGE_SIZE.
+cache = {}
+
+#: Reads larger than this many pages bypass the cache, so that dumping
+#: or searching large regions does not fill it up.
+cache_max_pages = 64
+
+#: Number of pages served from the cache, and number of pages which
+#: had to be fetched from the inferior.
+cache_hits   = 0
+cache_misses = 0
+
+@pwndbg.events.cont(priority=-1)
+@pwndbg.events.stop(priority=-1)
+@pwndbg.events.exit(priority=-1)
+@pwndbg.events.memory_changed(priority=-1)
+def clear_cache():
+    cache.clear()
+
+def readonly(data):
+    view = memoryview(data)
+    if hasattr(view, 'toreadonly'):
+        return view.toreadonly()
+
+    # Before Python 3.8 there is no way to make a read-only view of a
+    # bytearray, so the caller gets a view of a copy instead.
+    return memoryview(bytes(data))
+
+def read(addr, count, partial=False, view=False):
+    """
+    Read ``count`` bytes from the inferior at ``addr``.
+
+    Reads are served page-by-page out of the page cache where possible.
+    Contiguous runs of pages which are not yet cached are fetched with
+    a single read.
+
+    Returns:
+        A bytearray containing a copy of the data.  If ``view`` is set,
+        a read-only memoryview of the underlying buffer is returned
+        instead, which avoids copying the data.  The view always shows
+        memory as it was when it was read, even if it is written later.
+    """
+    addr  = int(addr)
+    count = int(count)
+
+    if count <= 0:
+        return readonly(bytearray()) if view else bytearray()
+
+    if partial:
+        return read_partial(addr, count, view)[0]
+
+    if not caching or count > cache_max_pages * PAGE_SIZE:
+        return read_uncached(addr, count, view)
+
+    global cache_hits, cache_misses
+
+    end    = addr + count
+    first  = page_align(addr)
+    pages  = range(first, end, PAGE_SIZE)
+    result = bytearray()
 
     try:
-        result = gdb.selected_inferior().read_memory(addr, count)
-    except gdb.error as e:
-        if not partial:
-            raise
+        missing = [p for p in pages if p not in cache]
+        cache_hits   += len(pages) - len(missing)
+        cache_misses += len(missing)
+
+        # Fetch each contiguous run of missing pages at once
+        i = 0
+        while i < len(missing):
+            j = i + 1
+            while j < len(missing) and missing[j] == missing[j-1] + PAGE_SIZE:
+                j += 1
+            start = missing[i]
+            data  = read_uncached(start, (j-i) * PAGE_SIZE)
+            for k in range(j-i):
+                cache[start + k*PAGE_SIZE] = data[k*PAGE_SIZE:(k+1)*PAGE_SIZE]
+            i = j
+    except gdb.error:
+        # Some page in the range is not readable.  Defer to the uncached
+        # path, so that the error is reported for the whole request.
+        return read_uncached(addr, count, view)
+
+    if view and first + PAGE_SIZE >= end:
+        return readonly(cache[first])[addr-first:end-first]
 
-        if not hasattr(e, 'message'):
-            e.message=str(e)
+    for page in pages:
+        lo = max(addr, page) - page
+        hi = min(end, page + PAGE_SIZE) - page
+        result += cache[page][lo:hi]
 
-        stop_addr = int(e.message.split()[-1], 0)
-        if stop_addr != addr:
-            return read(addr, stop_addr-addr)
+    if view:
+        return readonly(result)
 
-        # QEMU will return the start address as the failed
-        # read address.  Try moving back a few pages at a time.
-        stop_addr = addr + count
+    return result
 
-        # Move the stop address down to the previous page boundary
-        stop_addr &= PAGE_MASK
-        while stop_addr > addr:
-            result = read(addr, stop_addr-addr)
+#: File descriptor for /proc/$pid/mem of a local inferior.
+#: None if it has not been opened yet, False if it cannot be used
+#: and all reads must go through GDB.
+procmem = None
+procmem_pid = None
 
-            if result:
-                return result
+@pwndbg.events.start(priority=-1)
+@pwndbg.events.exit(priority=-1)
+def procmem_close():
+    global procmem, procmem_pid
+    if procmem:
+        try:    os.close(procmem)
+        except OSError: pass
+    procmem     = None
+    procmem_pid = None
 
-            # Move down by another page
-            stop_addr -= PAGE_SIZE
+@pwndbg.events.stop(priority=-1)
+def procmem_check_pid():
+    # e.g. after following a fork
+    if procmem is not None and procmem_pid != pwndbg.proc.pid:
+        procmem_close()
 
-    if pwndbg.compat.python3:
-        result = result.tobytes()
+def procmem_open():
+    global procmem, procmem_pid
+    procmem_close()
+
+    procmem     = False
+    procmem_pid = pwndbg.proc.pid
+
+    if not procmem_pid or pwndbg.remote.is_remote():
+        return
+
+    try:
+        procmem = os.open('/proc/%i/mem' % procmem_pid, os.O_RDONLY)
+    except OSError:
+        pass
+
+def procmem_pread(addr, count):
+    if hasattr(os, 'pread'):
+        return os.pread(procmem, count, addr)
+    os.lseek(procmem, addr, os.SEEK_SET)
+    return os.read(procmem, count)
+
+def procmem_read(addr, count):
+    """
+    Read memory via /proc/$pid/mem, which is much faster than going
+    through GDB for local inferiors.
+
+    Returns:
+        A bytes object, or None if the read must be done through GDB.
+        Raises gdb.MemoryError just like GDB does for unmapped memory.
+    """
+    global procmem
+
+    if procmem is None:
+        procmem_open()
+
+    for attempt in range(2):
+        if not procmem:
+            return None
+
+        try:
+            data = procmem_pread(addr, count)
+        except (OverflowError, ValueError):
+            # Address does not fit into an off_t, e.g. [vsyscall]
+            return None
+        except OSError as e:
+            if e.errno != errno.EIO:
+                # EPERM and friends, stick to GDB for this inferior
+                procmem = False
+                return None
+            data = b''
+            break
+
+        # An empty read means the address space which the descriptor
+        # refers to went away (e.g. the inferior exec'd).
+        if data or not count:
+            break
+
+        if not attempt:
+            procmem_open()
+    else:
+        procmem = False
+        return None
+
+    if len(data) < count:
+        raise gdb.MemoryError("Cannot access memory at address %#x" % (addr + len(data)))
+
+    return data
+
+def read_uncached(addr, count, view=False):
+    result = procmem_read(addr, count)
+
+    if result is None:
+        result = gdb.selected_inferior().read_memory(addr, count)
+
+    if view:
+        try:
+            return readonly(result)
+        except TypeError:
+            # Python2 GDB returns an old-style buffer object
+            return readonly(bytearray(result))
 
     return bytearray(result)
 
+def mapped_end(addr, end):
+    """
+    Returns the end of the known-mapped region which starts at ``addr``,
+    clamped to ``end``.  Uses /proc/$pid/maps when it is available,
+    otherwise just returns ``end``.
+    """
+    pages = pwndbg.vmmap.proc_pid_maps()
+
+    if not pages:
+        return end
+
+    stop = addr
+    for page in pages:
+        if page.vaddr > stop:
+            break
+        if stop in page:
+            stop = page.vaddr + page.memsz
+
+    return min(stop, end)
+
+def read_partial(addr, count, view=False):
+    """
+    Read up to ``count`` bytes from the inferior at ``addr``, stopping
+    at the first byte which cannot be read.
+
+    Returns:
+        A tuple of ``(data, fault)``, where ``fault`` is the address of
+        the first byte which could not be read, or None if all of the
+        requested data was read.  ``data`` is as returned by ``read``.
+    """
+    addr  = int(addr)
+    count = int(count)
+    end   = addr + count
+
+    if count <= 0:
+        return read(addr, 0, view=view), None
+
+    stop  = mapped_end(addr, end)
+
+    if stop > addr:
+        try:
+            return read(addr, stop-addr, view=view), (stop if stop < end else None)
+        except gdb.error as e:
+            # Local targets report the faulting address, but GDB and
+            # QEMU generally report the start address of the read.
+            try:
+                fault = int(str(e).split()[-1], 0)
+            except ValueError:
+                fault = addr
+            if addr < fault < stop:
+                try:
+                    return read(addr, fault-addr, view=view), fault
+                except gdb.error:
+                    pass
+                stop = fault
+
+        # Find the largest readable prefix with a binary search,
+        # rather than walking backward one page at a time.
+        first = page_align(addr)
+        pages = count_readable_pages(first, PAGE_SIZE, (stop - first + PAGE_SIZE - 1) // PAGE_SIZE)
+        stop  = min(stop, first + pages * PAGE_SIZE)
+
+        # In case the readable pages are not contiguous, keep moving
+        # the stop address down until we can read it.
+        while stop > addr:
+            try:
+                return read(addr, stop-addr, view=view), stop
+            except gdb.error:
+                stop = page_align(stop-1)
+
+    return read(addr, 0, view=view), addr
+
+def read_many(ranges, partial=True):
+    """
+    Read several ``(address, size)`` ranges from the inferior at once.
+
+    Ranges which overlap or are adjacent are merged, so that as few
+    underlying reads as possible are performed.  If ``partial`` is not
+    set, merged ranges which cannot be read in full are not searched
+    for their readable part, which avoids looking at the memory layout.
+
+    Returns:
+        A list with one entry per requested range, in the same order.
+        Each entry is a ``memoryview`` into the merged read, or ``None``
+        if any part of that range could not be read.
+    """
+    ranges  = [(int(a), int(s)) for a, s in ranges]
+    results = [None] * len(ranges)
+    order   = sorted(range(len(ranges)), key=lambda i: ranges[i][0])
+
+    # Coalesce into spans of [start, end, [indexes of member ranges]]
+    spans = []
+    for i in order:
+        a, s = ranges[i]
+        if s <= 0:
+            results[i] = readonly(bytearray())
+        elif spans and a <= spans[-1][1]:
+            spans[-1][1] = max(spans[-1][1], a+s)
+            spans[-1][2].append(i)
+        else:
+            spans.append([a, a+s, [i]])
+
+    for start, end, members in spans:
+        try:
+            view = read(start, end-start, partial=partial, view=True)
+        except gdb.error:
+            # Without looking for the readable part, the ranges which
+            # were merged can only be tried on their own.
+            if len(members) > 1:
+                for i in members:
+                    results[i] = read_many([ranges[i]], partial)[0]
+                continue
+
+            view = readonly(bytearray())
+
+        fault = start + len(view)
+        retry = []
+
+        for i in members:
+            a, s = ranges[i]
+            if a + s <= fault:
+                results[i] = view[a-start:a-start+s]
+            elif a > fault:
+                retry.append(i)
+
+        # Ranges which lie entirely beyond the faulting address may
+        # still be readable, e.g. if the span crossed an unmapped hole.
+        if retry:
+            for i, value in zip(retry, read_many([ranges[i] for i in retry], partial)):
+                results[i] = value
+
+    return results
+
 def readtype(gdb_type, addr):
     return int(gdb.Value(addr).cast(gdb_type.pointer()).dereference())
 
 def write(addr, data):
     gdb.selected_inferior().write_memory(addr, data)
+    pwndbg.memoize.bump('writes')
+
+    # Keep any cached pages coherent with what we just wrote.  Cached
+    # pages are replaced rather than modified in place, since callers
+    # may hold views into them.
+    addr = int(addr)
+    data = bytearray(data)
+    end  = addr + len(data)
+    for page in range(page_align(addr), end, PAGE_SIZE):
+        if page not in cache:
+            continue
+        lo = max(addr, page)
+        hi = min(end, page + PAGE_SIZE)
+        contents = bytearray(cache[page])
+        contents[lo-page:hi-page] = data[lo-addr:hi-addr]
+        cache[page] = contents
 
 def peek(address):
     try:    return read(address, 1)
@@ -73,28 +398,68 @@ def ushort(addr): return readtype(pwndbg.typeinfo.ushort, addr)
 def uint(addr):   return readtype(pwndbg.typeinfo.uint, addr)
 def pvoid(addr):  return readtype(pwndbg.typeinfo.pvoid, addr)
 
-def u8(addr): return readtype(pwndbg.typeinfo.uint8, addr)
-def u16(addr): return readtype(pwndbg.typeinfo.uint16, addr)
-def u32(addr): return readtype(pwndbg.typeinfo.uint32, addr)
-def u64(addr): return readtype(pwndbg.typeinfo.uint64, addr)
+#: struct format characters for unsigned integers, keyed by size in bytes
+formats = {1: 'B', 2: 'H', 4: 'I', 8: 'Q'}
 
-def u(addr, size=None):
+def unpack_array(addr, count, size, signed=False, partial=False):
+    """
+    Read ``count`` integers of ``size`` bytes each, starting at ``addr``,
+    with a single read from the inferior.
+
+    Values are decoded according to the endianness of the current
+    architecture.  If ``partial`` is set, only the integers which
+    precede the first unreadable byte are returned.
+
+    Returns:
+        A tuple of integers.
+    """
+    fmt = formats[size]
+    if signed:
+        fmt = fmt.lower()
+
+    data = read(addr, count*size, partial=partial)
+
+    if partial:
+        count = len(data) // size
+
+    endian = '<' if pwndbg.arch.endian == 'little' else '>'
+    return struct.unpack_from('%s%i%s' % (endian, count, fmt), data)
+
+def u8_array(addr, count, partial=False):  return unpack_array(addr, count, 1, False, partial)
+def u16_array(addr, count, partial=False): return unpack_array(addr, count, 2, False, partial)
+def u32_array(addr, count, partial=False): return unpack_array(addr, count, 4, False, partial)
+def u64_array(addr, count, partial=False): return unpack_array(addr, count, 8, False, partial)
+
+def s8_array(addr, count, partial=False):  return unpack_array(addr, count, 1, True, partial)
+def s16_array(addr, count, partial=False): return unpack_array(addr, count, 2, True, partial)
+def s32_array(addr, count, partial=False): return unpack_array(addr, count, 4, True, partial)
+def s64_array(addr, count, partial=False): return unpack_array(addr, count, 8, True, partial)
+
+def u_array(addr, count, size=None, partial=False):
     if size is None:
         size = pwndbg.arch.ptrsize * 8
-    return {
-        8: u8,
-        16: u16,
-        32: u32,
-        64: u64
-    }[size](addr)
-
-def s8(addr): return readtype(pwndbg.typeinfo.int8, addr)
-def s16(addr): return readtype(pwndbg.typeinfo.int16, addr)
-def s32(addr): return readtype(pwndbg.typeinfo.int32, addr)
-def s64(addr): return readtype(pwndbg.typeinfo.int64, addr)
+    return unpack_array(addr, count, size // 8, False, partial)
 
-def write(addr, data):
-    gdb.selected_inferior().write_memory(addr, data)
+def pointers(addr, count, partial=False):
+    """
+    Read ``count`` pointer-sized values starting at ``addr``.
+    """
+    return unpack_array(addr, count, pwndbg.arch.ptrsize, False, partial)
+
+def pointer(addr): return pointers(addr, 1)[0]
+
+def u8(addr):  return u8_array(addr, 1)[0]
+def u16(addr): return u16_array(addr, 1)[0]
+def u32(addr): return u32_array(addr, 1)[0]
+def u64(addr): return u64_array(addr, 1)[0]
+
+def u(addr, size=None):
+    return u_array(addr, 1, size)[0]
+
+def s8(addr):  return s8_array(addr, 1)[0]
+def s16(addr): return s16_array(addr, 1)[0]
+def s32(addr): return s32_array(addr, 1)[0]
+def s64(addr): return s64_array(addr, 1)[0]
 
 def poi(type, addr): return gdb.Value(addr).cast(type.pointer()).dereference()
 
@@ -112,44 +477,87 @@ def page_offset(address): return (address & (PAGE_SIZE-1))
 assert round_down(0xdeadbeef, 0x1000) == 0xdeadb000
 assert round_up(0xdeadbeef, 0x1000)   == 0xdeadc000
 
-def find_upper_boundary(addr, max_pages=1024):
-    addr = pwndbg.memory.page_align(int(addr))
+@pwndbg.memoize.reset_on_change(depends=('maps',))
+def readable_page(page):
+    """
+    Returns whether the page at ``page`` can be read.
+    The result is remembered until the memory layout changes.
+    """
+    if page in cache:
+        return True
+    if not 0 <= page <= pwndbg.arch.ptrmask:
+        return False
     try:
-        for i in range(max_pages):
-            pwndbg.memory.read(addr, 1)
-            # import sys
-            # sys.stdout.write(hex(addr) + '\n')
-            addr += pwndbg.memory.PAGE_SIZE
-    except gdb.MemoryError:
-        pass
-    return addr
+        read_uncached(page, 1)
+        return True
+    except gdb.error:
+        return False
+
+def count_readable_pages(addr, step, max_pages):
+    """
+    Count the contiguous readable pages starting at the page-aligned
+    ``addr`` and moving ``step`` bytes at a time, up to ``max_pages``.
+
+    Instead of probing every page, this gallops away from ``addr``
+    (probing 1, 2, 4, ... pages away) until it finds an unreadable
+    page, and then binary searches for the edge.  This assumes that
+    the readable region has no holes in it, which holds for a
+    single mapping.
+    """
+    def readable(i):
+        return readable_page(addr + i*step)
+
+    if max_pages <= 0 or not readable(0):
+        return 0
+
+    lo, hi = 0, max_pages
+    i = 1
+    while i < hi:
+        if not readable(i):
+            hi = i
+            break
+        lo = i
+        i *= 2
+
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if readable(mid): lo = mid
+        else:             hi = mid
+
+    return hi
+
+def find_upper_boundary(addr, max_pages=1024):
+    """
+    Returns the end address of the readable region containing ``addr``.
+    """
+    addr = page_align(int(addr))
+    return addr + count_readable_pages(addr, PAGE_SIZE, max_pages) * PAGE_SIZE
 
 def find_lower_boundary(addr, max_pages=1024):
-    addr = pwndbg.memory.page_align(int(addr))
-    try:
-        for i in range(max_pages):
-            pwndbg.memory.read(addr, 1)
-            addr -= pwndbg.memory.PAGE_SIZE
-    except gdb.MemoryError:
-        pass
-    return addr
+    """
+    Returns the start address of the readable region containing ``addr``.
+    """
+    addr  = page_align(int(addr))
+    count = count_readable_pages(addr, -PAGE_SIZE, max_pages)
+    if not count:
+        return addr
+    return addr - (count-1) * PAGE_SIZE
 
 class Page(object):
     """
     Represents the address space and page permissions of at least
     one page of memory.
     """
-    vaddr   = 0 #: Starting virtual address
-    memsz   = 0 #: Size of the address space, in bytes
-    flags   = 0 #: Flags set by the ELF file, see PF_X, PF_R, PF_W
-    offset  = 0 #: Offset into the original ELF file that the data is loaded from
-    objfile = '' #: Path to the ELF on disk
+    # There can be a great many of these, e.g. while the pages of an
+    # ELF file are being merged, so they do not get a __dict__.
+    __slots__ = ('vaddr', 'memsz', 'flags', 'offset', 'objfile')
+
     def __init__(self, start, size, flags, offset, objfile=''):
-        self.vaddr  = start
-        self.memsz  = size
-        self.flags  = flags
-        self.offset = offset
-        self.objfile = objfile
+        self.vaddr   = start   #: Starting virtual address
+        self.memsz   = size    #: Size of the address space, in bytes
+        self.flags   = flags   #: Flags set by the ELF file, see PF_X, PF_R, PF_W
+        self.offset  = offset  #: Offset into the original ELF file that the data is loaded from
+        self.objfile = objfile #: Path to the ELF on disk
 
         # if self.rwx:
             # self.flags = self.flags ^ 1
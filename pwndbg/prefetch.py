@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Speculatively reads the memory which the context display is about
+to look at when the inferior stops, so that it is pulled into the
+memory cache with as few reads as possible.
+
+Nearly every stop shows the stack (telescope at $sp), the code
+around $pc, and a pointer chain for every register.
+"""
+import pwndbg.arch
+import pwndbg.events
+import pwndbg.memory
+import pwndbg.regs
+import pwndbg.vmmap
+
+#: Whether to prefetch memory when the inferior stops
+enabled = True
+
+#: Number of bytes of stack to prefetch, starting at $sp
+stack_size = 0x200
+
+#: Number of bytes of code to prefetch around $pc.
+#: A quarter of this is taken from before $pc.
+code_size = 0x100
+
+#: Number of pages fetched by the last prefetch
+pages = 0
+
+#: Number of reads which the last prefetch took
+reads = 0
+
+@pwndbg.events.stop
+def prefetch():
+    global pages, reads
+
+    pages = reads = 0
+
+    if not enabled or not pwndbg.memory.caching:
+        return
+
+    # Only the pages which are already known are used, since working out
+    # the memory layout again may take more reads than we would save.
+    table = pwndbg.vmmap.cached_table()
+
+    if not table:
+        return
+
+    ranges = []
+
+    def add(address, size):
+        page = table.find(address)
+        if page is not None and page.read:
+            ranges.append((address, min(size, page.vaddr + page.memsz - address)))
+
+    sp = pwndbg.regs.sp
+    if sp:
+        add(sp, stack_size)
+
+    pc = pwndbg.regs.pc
+    if pc:
+        before = min(pc, code_size // 4)
+        add(pc - before, code_size)
+
+    # Only follow registers which point at known memory, so that
+    # we don't waste reads on things which are not pointers.
+    for reg in pwndbg.regs.gpr:
+        value = pwndbg.regs[reg]
+        if value:
+            add(value, pwndbg.arch.ptrsize)
+
+    cached = set(pwndbg.memory.cache)
+    pwndbg.memory.read_many(ranges, partial=False)
+    fetched = sorted(set(pwndbg.memory.cache) - cached)
+
+    # Each run of contiguous pages was fetched with a single read
+    pages = len(fetched)
+    reads = sum(1 for i, page in enumerate(fetched)
+                if not i or fetched[i-1] + pwndbg.memory.PAGE_SIZE != page)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Remembers the common registers at each of the last few stops, so that
+questions like "when did rax last change?" can be answered without
+running the program again.
+
+Each stop is stored as a row holding the array of values from
+pwndbg.regs.snapshot(), in a ring buffer of bounded size.
+"""
+import collections
+
+import pwndbg.events
+import pwndbg.regs
+
+#: Whether to record the registers at each stop
+enabled = True
+
+#: Maximum number of stops which are remembered
+size = 1024
+
+#: A single stop.  ``index`` maps register names to positions in
+#: ``values``, and is shared by all rows for an architecture.
+Row = collections.namedtuple('Row', ('stop', 'pc', 'index', 'values', 'missing'))
+
+#: Rows for the most recent stops, oldest first
+history = collections.deque(maxlen=size)
+
+#: Number of stops since the process started
+stops = 0
+
+def resize(n):
+    global history, size
+    size    = n
+    history = collections.deque(history, maxlen=n)
+
+@pwndbg.events.start
+def clear():
+    global stops
+    history.clear()
+    stops = 0
+
+@pwndbg.events.stop
+def record():
+    global stops
+    stops += 1
+
+    if not enabled:
+        return
+
+    regs = pwndbg.regs.snapshot()
+
+    if regs is None:
+        return
+
+    history.append(Row(stops, regs.get('pc'), regs.index, regs.values, regs.missing))
+
+def value(row, reg):
+    """
+    Returns the value of ``reg`` in ``row``, or None if it was not
+    available at that stop.
+    """
+    i = row.index.get(reg)
+
+    if i is None or reg in row.missing:
+        return None
+
+    return row.values[i]
+
+def values(reg, count=None):
+    """
+    Returns a list of ``(row, value)`` for ``reg`` at the last
+    ``count`` stops, oldest first.
+    """
+    rows = list(history)
+    if count is not None:
+        rows = rows[-count:]
+    return [(row, value(row, reg)) for row in rows]
+
+def last_change(reg):
+    """
+    Returns ``(before, after)``, the rows for the stops before and
+    after ``reg`` last changed, or None if it did not change.
+    """
+    after = None
+    for row in reversed(history):
+        if after is not None and value(row, reg) != value(after, reg):
+            return row, after
+        after = row
+    return None
+
+def pointing_into(reg, pages):
+    """
+    Returns ``(row, value)`` for each stop where ``reg`` pointed into
+    any of the pwndbg.memory.Page objects in ``pages``.
+    """
+    result = []
+    for row in history:
+        v = value(row, reg)
+        if v is not None and any(v in page for page in pages):
+            result.append((row, v))
+    return result
@@ -4,7 +4,10 @@
 Reading register value from the inferior, and provides a
 standardized interface to registers like "sp" and "pc".
 """
+import array
 import collections
+import itertools
+import operator
 import re
 import sys
 from types import ModuleType
@@ -80,6 +83,19 @@ class RegisterSet(object):
         self.all = set(i for i in misc) | set(flags) | set(self.common)
         self.all -= {None}
 
+        # Order of the registers in a RegisterFile, which holds either
+        # the common registers or all of them.  'pc' and 'sp' are
+        # aliases for the program counter and stack pointer.
+        self.names, self.index = self.layout(self.common)
+        self.all_names, self.all_index = self.layout(sorted(self.all - {'pc', 'sp'} | {pc, stack}))
+
+    def layout(self, names):
+        names = tuple(names)
+        index = {name: i for i, name in enumerate(names)}
+        index.setdefault('pc', index[self.pc])
+        index.setdefault('sp', index[self.stack])
+        return names, index
+
     def __iter__(self):
         for r in self.all:
             yield r
@@ -233,28 +249,105 @@ try:
 except AttributeError:
     get_register = gdb77_get_register
 
+def read_register(name, frame=None):
+    """
+    Reads the register ``name`` as an unsigned integer, from ``frame``
+    if it is given and GDB supports it.
+    """
+    # Seriously, gdb? Only accepts uint32.
+    if 'eflags' in name:
+        value = gdb77_get_register(name)
+        value = value.cast(pwndbg.typeinfo.uint32)
+    else:
+        if frame is not None and get_register is gdb79_get_register:
+            value = frame.read_register(name)
+        else:
+            value = get_register(name)
+        value = value.cast(pwndbg.typeinfo.ptrdiff)
+
+    return int(value) & pwndbg.arch.ptrmask
+
+
+class RegisterFile(object):
+    """
+    The values of the common registers of an architecture at one point
+    in time, or of all of them if ``full`` is set, read in a single pass.
+
+    Values are stored in an array, in the order of ``RegisterSet.names``
+    (or ``RegisterSet.all_names``).  Registers which could not be read
+    are listed in ``missing``.
+    """
+    def __init__(self, regset, full=False):
+        if full:
+            self.names, self.index = regset.all_names, regset.all_index
+        else:
+            self.names, self.index = regset.names, regset.index
+
+        self.values  = array.array(pwndbg.compat.uint64, [0]) * len(self.names)
+        self.missing = set()
+
+        frame = gdb.newest_frame()
+
+        for i, name in enumerate(self.names):
+            try:
+                self.values[i] = read_register(name, frame)
+            except (ValueError, gdb.error):
+                self.missing.add(name)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def get(self, name):
+        """
+        Returns the value of the register ``name``, or None if it could
+        not be read.  Raises KeyError if it is not in the register file.
+        """
+        i = self.index[name]
+        if self.names[i] in self.missing:
+            return None
+        return self.values[i]
+
+    def changed(self, other):
+        """
+        Returns the names of the registers whose values differ
+        from those in the RegisterFile ``other``.
+        """
+        if self.names != other.names:
+            return list(self.names)
+
+        if self.values == other.values:
+            return []
+
+        return list(itertools.compress(self.names, map(operator.ne, self.values, other.values)))
+
+@pwndbg.proc.OnlyWhenRunning
+@pwndbg.memoize.reset_on_change(depends=('regs',))
+def snapshot(full=False):
+    """
+    Returns a RegisterFile of the common registers of the current
+    architecture, or of all of them if ``full`` is set, which is read
+    the first time it is needed after each stop.
+    """
+    return RegisterFile(arch_to_regs[pwndbg.arch.current], full)
+
 
 class module(ModuleType):
-    last = {}
+    last = None
 
-    @pwndbg.memoize.reset_on_stop
+    @pwndbg.memoize.reset_on_change(depends=('regs',))
     def __getattr__(self, attr):
-        attr = attr.lstrip('$')
-        try:
-            # Seriously, gdb? Only accepts uint32.
-            if 'eflags' in attr:
-                value = gdb77_get_register(attr)
-                value = value.cast(pwndbg.typeinfo.uint32)
-            else:
-                value = get_register(attr)
-                value = value.cast(pwndbg.typeinfo.ptrdiff)
+        attr  = attr.lstrip('$')
+        regs  = snapshot()
+
+        if regs is not None and attr in regs:
+            return regs.get(attr)
 
-            value = int(value)
-            return value & pwndbg.arch.ptrmask
+        try:
+            return read_register(attr)
         except (ValueError, gdb.error):
             return None
 
-    @pwndbg.memoize.reset_on_stop
+    @pwndbg.memoize.reset_on_change(depends=('regs',))
     def __getitem__(self, item):
         if isinstance(item, int):
             return arch_to_regs[pwndbg.arch.current][item]
@@ -343,21 +436,26 @@ class module(ModuleType):
         return retval
 
     arch_to_regs = arch_to_regs
+    RegisterFile = RegisterFile
+    snapshot     = staticmethod(snapshot)
 
     @property
     def changed(self):
-        delta = []
-        for reg, value in self.last.items():
-            if self[reg] != value:
-                delta.append(reg)
-        return delta
+        current = snapshot()
+
+        if current is None or self.last is None:
+            return []
+
+        return current.changed(self.last)
 
 # To prevent garbage collection
 tether = sys.modules[__name__]
 sys.modules[__name__] = module(__name__, '')
 
 
-@pwndbg.events.cont
+# This runs before the cached registers are reset, so the snapshot
+# taken while stopped is reused if there is one.
+@pwndbg.events.cont(priority=-2)
 def update_last():
     M = sys.modules[__name__]
-    M.last = {k:M[k] for k in M.common}
+    M.last = snapshot()
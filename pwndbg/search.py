@@ -3,40 +3,77 @@
 """
 Search the address space for byte patterns.
 """
+import re
 import struct
 
 import gdb
 import pwndbg.arch
+import pwndbg.compat
 import pwndbg.memory
+import pwndbg.remote
 import pwndbg.typeinfo
 import pwndbg.vmmap
 
+#: Amount of memory to read at a time when searching locally
+CHUNK_SIZE = 0x100000
+
 
 def search(searchfor):
-    value = searchfor
-    size  = None
+    # Remote stubs may implement searching themselves (qSearch:memory),
+    # which saves transferring all of memory to us.
+    if pwndbg.remote.is_remote():
+        search_range = search_inferior
+    else:
+        search_range = search_memory
+
+    for start, end in pwndbg.vmmap.table().ranges():
+        for address in search_range(start, end, searchfor):
+            yield address
+
+def search_memory(start, end, searchfor):
+    """
+    Reads memory a chunk at a time, and searches it directly.
+    """
+    if not isinstance(searchfor, bytes):
+        searchfor = searchfor.encode('utf-8')
+
+    pattern = re.compile(re.escape(searchfor))
+
+    while start < end:
+        data, fault = pwndbg.memory.read_partial(start, min(CHUNK_SIZE, end-start), view=True)
+
+        if not pwndbg.compat.python3:
+            data = data.tobytes()
+
+        for match in pattern.finditer(data):
+            yield start + match.start()
+
+        if fault is not None or start + len(data) >= end:
+            break
+
+        # Overlap the chunks so that matches across the boundary are found
+        start += max(1, len(data) - len(searchfor) + 1)
 
+def search_inferior(start, end, searchfor):
+    """
+    Searches memory via GDB.
+    """
     i = gdb.selected_inferior()
 
-    maps = pwndbg.vmmap.get()
-    hits = []
-    for vmmap in maps:
-        start = vmmap.vaddr
-        end   = start + vmmap.memsz
-        while True:
-            # No point in searching if we can't read the memory
-            if not pwndbg.memory.peek(start):
-                break
+    while True:
+        # No point in searching if we can't read the memory
+        if not pwndbg.memory.peek(start):
+            break
 
-            start = i.search_memory(start, end - start, searchfor)
+        start = i.search_memory(start, end - start, searchfor)
 
-            if start is None:
-                break
+        if start is None:
+            break
 
-            # For some reason, search_memory will return a positive hit
-            # when it's unable to read memory.
-            if not pwndbg.memory.peek(start):
-                break
+        # For some reason, search_memory will return a positive hit
+        # when it's unable to read memory.
+        if not pwndbg.memory.peek(start):
+            break
 
-            yield start
-            start += len(searchfor)
+        yield start
+        start += len(searchfor)
@@ -0,0 +1,282 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Snapshots of the writable memory of the inferior, and fast diffing
+between them.
+
+Pages are stored by the hash of their contents, so a page which is the
+same in several snapshots (or several times in the same snapshot, e.g.
+pages full of zeroes) is only stored once.
+"""
+import hashlib
+import os
+import tempfile
+
+import pwndbg.compat
+import pwndbg.memory
+import pwndbg.vmmap
+
+#: Once the page store holds this many bytes in memory, any further
+#: pages are spilled to a temporary file.
+MEMORY_LIMIT = 256 * 1024 * 1024
+
+#: Amount of memory to read from the inferior at a time
+CHUNK_SIZE = 0x100000
+
+#: Size of the blocks compared when narrowing down changes in a page
+BLOCK_SIZE = 64
+
+
+class Store(object):
+    """
+    Content-addressed storage for pages of memory.
+    """
+    def __init__(self, limit=MEMORY_LIMIT):
+        self.limit  = limit
+        self.size   = 0
+        self.pages  = {} #: Maps digest to page data, or to its offset in the spill file
+        self.refs   = {} #: Number of references to each digest
+        self.spill  = None
+        self.wasted = 0 #: Bytes of the spill file which are no longer used
+
+    def add(self, data):
+        """
+        Stores the page ``data`` and returns its digest.
+
+        Each call adds a reference to the page, which must be dropped
+        with ``release`` once it is no longer needed.
+        """
+        digest = hashlib.sha1(data).digest()
+
+        self.refs[digest] = self.refs.get(digest, 0) + 1
+
+        if digest in self.pages:
+            return digest
+
+        if self.size + len(data) <= self.limit:
+            self.pages[digest] = bytes(data)
+            self.size += len(data)
+        else:
+            if self.spill is None:
+                self.spill = tempfile.TemporaryFile(prefix='pwndbg-snapshot-')
+            self.spill.seek(0, os.SEEK_END)
+            self.pages[digest] = (self.spill.tell(), len(data))
+            self.spill.write(data)
+
+        return digest
+
+    def get(self, digest):
+        data = self.pages[digest]
+
+        if isinstance(data, tuple):
+            offset, size = data
+            self.spill.seek(offset)
+            data = self.spill.read(size)
+
+        return data
+
+    def release(self, digest):
+        """
+        Drops a reference to the page ``digest``, and forgets it once
+        nothing refers to it any more.
+        """
+        self.refs[digest] -= 1
+
+        if self.refs[digest]:
+            return
+
+        del self.refs[digest]
+        data = self.pages.pop(digest)
+
+        if isinstance(data, tuple):
+            self.wasted += data[1]
+        else:
+            self.size -= len(data)
+
+    def compact(self):
+        """
+        Rewrites the spill file without the pages which are no longer
+        used, once they take up at least half of it.
+        """
+        if self.spill is None:
+            return
+
+        spilled = [(digest, data) for digest, data in self.pages.items() if isinstance(data, tuple)]
+
+        if not spilled:
+            self.spill.close()
+            self.spill  = None
+            self.wasted = 0
+            return
+
+        if self.wasted < sum(size for _, (_, size) in spilled):
+            return
+
+        spill = tempfile.TemporaryFile(prefix='pwndbg-snapshot-')
+
+        for digest, (offset, size) in sorted(spilled, key=lambda item: item[1]):
+            self.spill.seek(offset)
+            self.pages[digest] = (spill.tell(), size)
+            spill.write(self.spill.read(size))
+
+        self.spill.close()
+        self.spill  = spill
+        self.wasted = 0
+
+    def clear(self):
+        self.pages.clear()
+        self.refs.clear()
+        self.size   = 0
+        self.wasted = 0
+        if self.spill is not None:
+            self.spill.close()
+            self.spill = None
+
+store = Store()
+
+
+class Snapshot(object):
+    """
+    The contents of every writable page at some point in time.
+    """
+    def __init__(self, name):
+        self.name  = name
+        self.pages = {} #: Maps page address to digest of its contents
+
+    def __len__(self):
+        return len(self.pages)
+
+    def __repr__(self):
+        return "%s(%r, %i pages)" % (self.__class__.__name__, self.name, len(self))
+
+#: All snapshots which have been saved, by name
+snapshots = {}
+
+
+def save(name):
+    """
+    Captures every writable page listed by pwndbg.vmmap.table()
+    into a new snapshot named ``name``.
+
+    Returns:
+        The new Snapshot object.
+    """
+    snapshot = Snapshot(name)
+    size     = pwndbg.memory.PAGE_SIZE
+
+    # Only the writable pages
+    for start, end in pwndbg.vmmap.table().ranges(flags=2):
+        while start < end:
+            data, fault = pwndbg.memory.read_partial(start, min(CHUNK_SIZE, end-start), view=True)
+
+            if not pwndbg.compat.python3:
+                data = data.tobytes()
+
+            for offset in range(0, len(data), size):
+                snapshot.pages[start + offset] = store.add(data[offset:offset+size])
+
+            if fault is not None:
+                break
+
+            start += len(data)
+
+    # Replace any snapshot with the same name.  This is done after
+    # the new one is stored, so that pages they share are kept.
+    if name in snapshots:
+        release(snapshots[name])
+
+    snapshots[name] = snapshot
+    return snapshot
+
+def release(snapshot):
+    for digest in snapshot.pages.values():
+        store.release(digest)
+
+    store.compact()
+
+def delete(name):
+    release(snapshots.pop(name))
+
+    # Nothing is shared any more, so we can throw all of the pages away
+    if not snapshots:
+        store.clear()
+
+def changed_ranges(address, a, b):
+    """
+    Compares the contents ``a`` and ``b`` of the page at ``address``.
+
+    Whole blocks are compared, and each run of blocks which differ is
+    only narrowed down to the bytes which differ at its ends, so a
+    range may contain some bytes which are the same.
+
+    Returns:
+        A list of ``(start, end)`` address ranges which differ.
+    """
+    ranges = []
+    size   = max(len(a), len(b))
+    block  = 0
+
+    while block < size:
+        if a[block:block+BLOCK_SIZE] == b[block:block+BLOCK_SIZE]:
+            block += BLOCK_SIZE
+            continue
+
+        first = block
+        while block < size and a[block:block+BLOCK_SIZE] != b[block:block+BLOCK_SIZE]:
+            block += BLOCK_SIZE
+        last = block - BLOCK_SIZE
+
+        # Narrow down the first and last blocks to the bytes which differ
+        x = bytearray(a[first:first+BLOCK_SIZE])
+        y = bytearray(b[first:first+BLOCK_SIZE])
+        i = 0
+        while i < min(len(x), len(y)) and x[i] == y[i]:
+            i += 1
+
+        x = bytearray(a[last:last+BLOCK_SIZE])
+        y = bytearray(b[last:last+BLOCK_SIZE])
+        j = max(len(x), len(y))
+        while j <= min(len(x), len(y)) and x[j-1] == y[j-1]:
+            j -= 1
+
+        ranges.append((address + first + i, address + last + j))
+
+    return ranges
+
+def diff(a, b):
+    """
+    Compares two snapshots, by name.
+
+    Pages are first compared by their digests, and only the pages
+    which differ are compared block by block.
+
+    Returns:
+        A sorted list of ``(start, end)`` address ranges which changed,
+        were mapped, or were unmapped between the two snapshots.
+    """
+    a = snapshots[a]
+    b = snapshots[b]
+
+    size   = pwndbg.memory.PAGE_SIZE
+    ranges = []
+
+    for address in sorted(set(a.pages) | set(b.pages)):
+        x = a.pages.get(address)
+        y = b.pages.get(address)
+
+        if x == y:
+            continue
+
+        if x is None or y is None:
+            changed = [(address, address + size)]
+        else:
+            changed = changed_ranges(address, store.get(x), store.get(y))
+
+        # Merge with changes which run across the page boundary
+        for start, end in changed:
+            if ranges and ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], end)
+            else:
+                ranges.append((start, end))
+
+    return ranges
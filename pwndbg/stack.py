@@ -18,6 +18,9 @@ import pwndbg.memory
 # Value is a pwndbg.memory.Page object
 stacks = {}
 
+# pwndbg.vmmap.PageTable of the stacks, rebuilt when they change
+table = None
+
 # Whether the stack is protected by NX.
 # This is updated automatically by is_executable.
 nx     = False
@@ -27,36 +30,71 @@ def find(address):
     Returns a pwndbg.memory.Page object which corresponds to the
     currently-loaded stack.
     """
-    if not stacks:
-        update()
+    global table
+
+    update()
+
+    if table is None:
+        table = pwndbg.vmmap.PageTable(stacks.values())
 
-    for stack in stacks:
-        if address in stack:
-            return stack
+    return table.find(address)
 
 def find_upper_stack_boundary(addr, max_pages=1024):
+    """
+    Returns the end address of the stack which contains ``addr``.
+
+    qemu-user likes to paste the stack right before binaries in memory,
+    so this also stops at the first page which starts with an ELF header.
+    """
     addr = pwndbg.memory.page_align(int(addr))
-    try:
-        for i in range(max_pages):
-            data = pwndbg.memory.read(addr, 4)
-            if b'\x7fELF' == pwndbg.memory.read(addr, 4):
-                break
-            addr += pwndbg.memory.PAGE_SIZE
-    except gdb.MemoryError:
-        pass
-    return addr
+    end  = pwndbg.memory.find_upper_boundary(addr, max_pages)
 
-@pwndbg.events.stop
-@pwndbg.memoize.reset_on_stop
+    if end == addr:
+        return addr
+
+    # Only the start of each page can be an ELF header, so read the
+    # stack in chunks of a few pages and check the start of each one.
+    chunk = 64 * pwndbg.memory.PAGE_SIZE
+
+    for start in range(addr, end, chunk):
+        data, fault = pwndbg.memory.read_partial(start, min(chunk, end-start), view=True)
+
+        for offset in range(0, len(data), pwndbg.memory.PAGE_SIZE):
+            if data[offset:offset+4].tobytes() == b'\x7fELF':
+                return start + offset
+
+        # A hole that the boundary search missed
+        if fault is not None:
+            return pwndbg.memory.page_align(fault)
+
+    return end
+
+@pwndbg.events.lazy(pwndbg.events.stop)
 def update():
     """
     For each running thread, updates the known address range
     for its stack.
+
+    This is deferred until the stacks are needed, since it has
+    to switch to every thread.  By then the user may have selected
+    another frame, which is restored afterwards.
     """
+    global table
+
     curr_thread = gdb.selected_thread()
+
+    # Nothing to do if the process is not running
+    if curr_thread is None:
+        return
+
+    curr_frame = gdb.selected_frame()
+
     try:
         for thread in gdb.selected_inferior().threads():
             thread.switch()
+
+            # Cached registers belong to the previous thread
+            pwndbg.memoize.bump('regs')
             sp = pwndbg.regs.sp
 
             sp_low = sp & ~(0xfff)
@@ -81,7 +119,10 @@ def update():
                 page.memsz  += (page.vaddr - low)
                 page.vaddr   = low
     finally:
+        table = None
         curr_thread.switch()
+        curr_frame.select()
+        pwndbg.memoize.bump('regs')
 
 
 @pwndbg.memoize.reset_on_stop
@@ -99,8 +140,9 @@ def clear():
     Called when the target process exits.
     """
     stacks.clear()
-    global nx
-    nx = False
+    global nx, table
+    nx    = False
+    table = None
 
 @pwndbg.events.stop
 @pwndbg.memoize.reset_on_exit
@@ -13,7 +13,7 @@ import pwndbg.typeinfo
 
 length = 15
 
-@pwndbg.events.stop
+@pwndbg.events.lazy(pwndbg.events.stop)
 def update_length():
     r"""
     Unfortunately there's not a better way to get at this info.
@@ -29,6 +29,7 @@ def update_length():
 
 def get(address, maxlen = None):
     if maxlen is None:
+        update_length()
         maxlen = length
 
     try:
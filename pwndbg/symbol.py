@@ -19,6 +19,7 @@ import pwndbg.memoize
 import pwndbg.memory
 import pwndbg.remote
 import pwndbg.stack
+import pwndbg.symtab
 import pwndbg.vmmap
 
 def get_directory():
@@ -58,6 +59,18 @@ def reset_remote_files():
     remote_files = {}
     remote_files_dir = tempfile.mkdtemp()
 
+def local_path(objfile):
+    """
+    Returns the path of a local copy of the objfile at path
+    ``objfile``, or None if there is not one.
+    """
+    # Only files which were downloaded from the server are known
+    # to match what is being debugged.
+    if pwndbg.remote.is_remote():
+        return remote_files.get(objfile)
+    return objfile
+
+
 @pwndbg.events.new_objfile
 def autofetch():
     """
@@ -72,9 +85,7 @@ def autofetch():
 
     searchpath = get_directory()
 
-    for mapping in pwndbg.vmmap.get():
-        objfile = mapping.objfile
-
+    for objfile in pwndbg.vmmap.table().names:
         # Don't attempt to download things like '[stack]' and '[heap]'
         if not objfile.startswith('/'):
             continue
@@ -95,7 +106,7 @@ def autofetch():
         remote_files[objfile] = local_path
 
 
-@pwndbg.memoize.reset_on_objfile
+@pwndbg.memoize.reset_on_objfile(maxsize=16384)
 def get(address, gdb_only=False):
     """
     Retrieve the textual name for a symbol
@@ -108,11 +119,10 @@ def get(address, gdb_only=False):
     if pwndbg.stack.find(address):
         return ''
 
-    # This sucks, but there's not a GDB API for this.
-    result = gdb.execute('info symbol %#x' % int(address), to_string=True, from_tty=False)
+    address = int(address)
+    name    = info_symbol(address)
 
-    if not gdb_only and result.startswith('No symbol'):
-        address = int(address)
+    if not gdb_only and not name:
         exe     = pwndbg.elf.exe()
         if exe:
             exe_map = pwndbg.vmmap.find(exe.address)
@@ -120,6 +130,22 @@ def get(address, gdb_only=False):
                 res =  pwndbg.ida.Name(address) or pwndbg.ida.GetFuncOffset(address)
                 return res or ''
 
+    return name
+
+def info_symbol(address):
+    """
+    Looks up the name of ``address`` in pwndbg.symtab, or with GDB.
+    """
+    page = pwndbg.vmmap.find(address)
+
+    if page:
+        name = pwndbg.symtab.lookup(address, page.objfile)
+        if name:
+            return name
+
+    # This sucks, but there's not a GDB API for this.
+    result = gdb.execute('info symbol %#x' % int(address), to_string=True, from_tty=False)
+
     # Expected format looks like this:
     # main in section .text of /bin/bash
     # main + 3 in section .text of /bin/bash
@@ -127,7 +153,6 @@ def get(address, gdb_only=False):
     # No symbol matches system-1.
     a, b, c, _ = result.split(None, 3)
 
-
     if b == '+':
         return "%s+%s" % (a, c)
     if b == 'in':
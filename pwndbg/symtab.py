@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Index of the symbols in the .symtab and .dynsym sections of the
+objfiles on disk, so that most addresses can be named without
+asking GDB.
+
+Only symbols with a size are used, and only for addresses inside
+them.  Anything else is left to GDB, as are C++ symbols, since GDB
+names them by their demangled names.
+"""
+import array
+import bisect
+import struct
+
+import pwndbg.compat
+import pwndbg.elf
+import pwndbg.memoize
+import pwndbg.memory
+import pwndbg.symbol
+import pwndbg.vmmap
+
+#: Whether addresses are looked up in the index before GDB
+enabled = True
+
+# ELF constants
+STB_LOCAL, STB_GLOBAL, STB_WEAK = 0,1,2
+STT_SECTION, STT_FILE, STT_TLS  = 3,4,6
+SHN_UNDEF, SHN_ABS              = 0,0xfff1
+
+class SymbolTable(object):
+    """
+    The symbols of one ELF file, sorted by their address in the file.
+
+    Addresses and sizes are stored in arrays, and each distinct name
+    is only stored once.
+    """
+    def __init__(self, symbols, load=0):
+        uint64 = pwndbg.compat.uint64
+
+        self.load   = load #: Address in the file of the first mapped page
+        self.starts = array.array(uint64)
+        self.sizes  = array.array(uint64)
+        self.names  = [] #: Each distinct name
+        self.ids    = array.array('I') #: Index into ``names`` of each symbol
+
+        ids = {}
+        for start, size, name in sorted(symbols):
+            if name not in ids:
+                ids[name] = len(self.names)
+                self.names.append(name)
+
+            self.starts.append(start)
+            self.sizes.append(size)
+            self.ids.append(ids[name])
+
+        # Highest end address of any symbol up to each index, so that
+        # symbols inside other symbols are still found.
+        self.ends = array.array(uint64)
+        end       = 0
+        for start, size in zip(self.starts, self.sizes):
+            end = max(end, start + size)
+            self.ends.append(end)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def lookup(self, address):
+        """
+        Returns the name of the symbol containing the file address
+        ``address``, as ``name`` or ``name+offset``, or None.
+        """
+        starts, sizes = self.starts, self.sizes
+
+        i = bisect.bisect_right(starts, address) - 1
+
+        while i >= 0 and address < self.ends[i]:
+            start = starts[i]
+
+            if start <= address < start + sizes[i]:
+                name = self.names[self.ids[i]]
+                if address == start:
+                    return name
+                return '%s+%i' % (name, address - start)
+
+            i -= 1
+
+        return None
+
+def read_symbols(path):
+    """
+    Reads the symbols with a size from the .symtab and .dynsym sections
+    of the ELF file at ``path``.
+
+    Returns:
+        A tuple containing (address of the first mapped page, list of
+        ``(address, size, name)`` tuples), or None if it is not an ELF file.
+    """
+    ehdr, phdrs = pwndbg.elf.file_headers(path)
+
+    if ehdr is None:
+        return None
+
+    loads = [phdr['p_vaddr'] for phdr in phdrs if phdr['p_type'] == pwndbg.elf.PT_LOAD]
+    load  = pwndbg.memory.page_align(min(loads)) if loads else 0
+
+    fmt, fields = pwndbg.elf.Sym[ehdr.ei_class]
+    fields      = fields.split()
+    Sym         = struct.Struct(ehdr.endian + fmt)
+
+    st_name, st_value, st_size, st_info, st_shndx = [fields.index(f) for f in
+        ('st_name', 'st_value', 'st_size', 'st_info', 'st_shndx')]
+
+    best = {} #: Maps address to (rank, size, name)
+
+    with open(path, 'rb') as f:
+        shoff = ehdr['e_shoff']
+        f.seek(shoff)
+        data  = f.read(ehdr['e_shnum'] * ehdr['e_shentsize'])
+        shdrs = pwndbg.elf.parse_shdrs(ehdr, data, shoff)
+
+        for shdr in shdrs:
+            if shdr['sh_type'] not in (pwndbg.elf.SHT_SYMTAB, pwndbg.elf.SHT_DYNSYM):
+                continue
+
+            if shdr['sh_link'] >= len(shdrs):
+                continue
+
+            strtab = shdrs[shdr['sh_link']]
+
+            f.seek(shdr['sh_offset'])
+            symbols = f.read(shdr['sh_size'])
+
+            f.seek(strtab['sh_offset'])
+            strings = f.read(strtab['sh_size'])
+
+            for offset in range(0, len(symbols) - Sym.size + 1, Sym.size):
+                sym  = Sym.unpack_from(symbols, offset)
+                size = sym[st_size]
+
+                if not size or sym[st_shndx] in (SHN_UNDEF, SHN_ABS):
+                    continue
+
+                if sym[st_info] & 0xf in (STT_SECTION, STT_FILE, STT_TLS):
+                    continue
+
+                start = sym[st_name]
+                end   = strings.find(b'\x00', start)
+                name  = strings[start:end] if end >= 0 else b''
+
+                if not name:
+                    continue
+
+                if pwndbg.compat.python3:
+                    name = name.decode('utf-8', 'replace')
+
+                # Mangled C++ names, which GDB demangles
+                if name.startswith('_Z'):
+                    continue
+
+                # When several symbols have the same address, prefer
+                # exported symbols, and then the fewest leading
+                # underscores, e.g. system over __libc_system.
+                address  = sym[st_value]
+                exported = (sym[st_info] >> 4) in (STB_GLOBAL, STB_WEAK)
+                rank     = (exported, len(name.lstrip('_')) - len(name), size)
+
+                if address not in best or rank > best[address][0]:
+                    best[address] = (rank, size, name)
+
+    return load, [(address, size, name) for address, (_, size, name) in best.items()]
+
+@pwndbg.memoize.reset_on_objfile
+def get(objfile):
+    """
+    Returns the SymbolTable for the objfile at path ``objfile``,
+    or None if it does not have one.
+    """
+    path = pwndbg.symbol.local_path(objfile)
+
+    if not path:
+        return None
+
+    try:
+        result = read_symbols(path)
+    except (IOError, OSError, struct.error):
+        return None
+
+    if not result or not result[1]:
+        return None
+
+    load, symbols = result
+    return SymbolTable(symbols, load)
+
+def lookup(address, objfile):
+    """
+    Returns the name of ``address`` in the objfile at path ``objfile``,
+    as ``name`` or ``name+offset``, or None if it is not in the index.
+    """
+    if not enabled or not objfile:
+        return None
+
+    table = get(objfile)
+
+    if table is None:
+        return None
+
+    base = pwndbg.vmmap.base(objfile)
+
+    if base is None:
+        return None
+
+    return table.lookup(address - base + table.load)
@@ -26,8 +26,17 @@ def is_pointer(value):
     type = type.strip_typedefs()
     return type.code == gdb.TYPE_CODE_PTR
 
-@pwndbg.events.start
-@pwndbg.events.stop
+def target():
+    """
+    Returns the inputs of update(), which is skipped when they have
+    not changed: the architecture of the selected frame, and the
+    generation of the loaded objfiles.
+    """
+    return (gdb.selected_frame().architecture().name(),
+            pwndbg.memoize.generations['objfiles'])
+
+@pwndbg.events.start(inputs=target)
+@pwndbg.events.stop(inputs=target)
 def update():
     module.char   = gdb.lookup_type('char')
     module.ulong  = gdb.lookup_type('unsigned long')
@@ -7,6 +7,8 @@ address ranges with various ELF files and permissions.
 The reason that we need robustness is that not every operating
 system has /proc/$$/maps, which backs 'info proc mapping'.
 """
+import array
+import bisect
 import sys
 
 import gdb
@@ -35,13 +37,140 @@ def get():
         if pages: pages.extend(info_sharedlibrary())
         else:     pages.extend(info_files())
 
+        pwndbg.stack.update()
         pages.extend(pwndbg.stack.stacks.values())
 
+        explore_registers()
+
     pages.extend(explored_pages)
     pages.sort()
     return pages
 
-@pwndbg.memoize.reset_on_stop
+class PageTable(object):
+    """
+    Immutable table of pages, sorted by address, for fast lookups.
+
+    Each field is stored in its own array, and objfile names are only
+    stored once, so that operations over the whole address space
+    (e.g. filtering by permissions or objfile) do not need to touch
+    any pwndbg.memory.Page objects.
+    """
+    def __init__(self, pages):
+        pages = sorted(pages)
+        uint64 = pwndbg.compat.uint64
+
+        self.starts   = array.array(uint64, [page.vaddr for page in pages])
+        self.sizes    = array.array(uint64, [page.memsz for page in pages])
+        self.flags    = array.array('B', [page.flags for page in pages])
+        self.offsets  = array.array(uint64, [page.offset for page in pages])
+        self.names    = [] #: Each distinct objfile name
+        self.objfiles = array.array('I') #: Index into ``names`` of each page
+        self.pages    = pages
+        self.last     = None #: The index returned by the last lookup
+
+        ids = {}
+        for page in pages:
+            name = page.objfile or ''
+            if name not in ids:
+                ids[name] = len(self.names)
+                self.names.append(name)
+            self.objfiles.append(ids[name])
+
+        # Highest end address of any page up to each index, so that
+        # overlapping pages (e.g. explored pages) are still found.
+        self.ends = array.array(uint64)
+        end       = 0
+        for start, size in zip(self.starts, self.sizes):
+            end = max(end, start + size)
+            self.ends.append(end)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self):
+        return iter(self.pages)
+
+    def __getitem__(self, i):
+        return self.pages[i]
+
+    def index(self, address):
+        """
+        Returns the index of the page which contains ``address``, or None.
+        """
+        starts, sizes = self.starts, self.sizes
+
+        i = self.last
+        if i is not None and starts[i] <= address < starts[i] + sizes[i]:
+            return i
+
+        i = bisect.bisect_right(starts, address) - 1
+
+        while i >= 0 and address < self.ends[i]:
+            if starts[i] <= address < starts[i] + sizes[i]:
+                self.last = i
+                return i
+            i -= 1
+
+        return None
+
+    def find(self, address):
+        """
+        Returns the page which contains ``address``, or None.
+        """
+        i = self.index(address)
+
+        if i is None:
+            return None
+
+        return self.pages[i]
+
+    def where(self, flags=0, objfile=None, address=None):
+        """
+        Returns the indices of the pages which have all of ``flags``,
+        whose objfile contains ``objfile``, and which contain ``address``.
+        """
+        names = range(len(self.names))
+
+        if objfile is not None:
+            names = set(i for i in names if objfile in self.names[i])
+
+        result = []
+        for i, (start, size) in enumerate(zip(self.starts, self.sizes)):
+            if self.flags[i] & flags != flags:
+                continue
+            if objfile is not None and self.objfiles[i] not in names:
+                continue
+            if address is not None and not start <= address < start + size:
+                continue
+            result.append(i)
+
+        return result
+
+    def ranges(self, flags=0, objfile=None):
+        """
+        Returns the ``(start, end)`` address ranges of the pages
+        selected as in ``where``.
+        """
+        return [(self.starts[i], self.starts[i] + self.sizes[i]) for i in self.where(flags, objfile)]
+
+@pwndbg.memoize.reset_on_change(depends=('maps',))
+def table():
+    """
+    Returns a PageTable of all known pages, which is built
+    once for each memory layout.
+    """
+    return PageTable(get())
+
+def cached_table():
+    """
+    Returns the PageTable which was last built, or None.
+
+    Unlike ``table``, this never checks whether the memory layout has
+    changed or explores any memory, so the table may be out of date.
+    """
+    return table.cache.get(())
+
+@pwndbg.memoize.reset_on_change(depends=('maps',))
 def find(address):
     if address is None or address < pwndbg.memory.MMAP_MIN_ADDR:
         return None
@@ -49,12 +178,22 @@ def find(address):
     if address:
         address = int(address)
 
-    for page in get():
-        if address in page:
-            return page
+    page = table().find(address)
+
+    if page is not None:
+        return page
 
     return explore(address)
 
+@pwndbg.memoize.reset_on_change(depends=('maps',))
+def base(objfile):
+    """
+    Returns the lowest address at which ``objfile`` is mapped,
+    or None if it is not mapped.
+    """
+    addresses = [page.vaddr for page in get() if page.objfile == objfile]
+    return min(addresses) if addresses else None
+
 def explore(address_maybe):
     """
     Given a potential address, check to see what permissions it has.
@@ -86,11 +225,13 @@ def explore(address_maybe):
     page.flags = flags
 
     explored_pages.append(page)
+    table.clear()
 
     return page
 
-# Automatically ensure that all registers are explored on each stop
-@pwndbg.events.stop
+# Ensure that all registers are explored after each stop, as soon
+# as anything needs the list of pages.
+@pwndbg.events.lazy(pwndbg.events.stop)
 def explore_registers():
     for regname in pwndbg.regs.common:
         find(pwndbg.regs[regname])
@@ -100,8 +241,80 @@ def explore_registers():
 def clear_explored_pages():
     while explored_pages:
         explored_pages.pop()
+    table.clear()
+
+#: Raw contents of /proc/$PID/maps as of the last time it was checked
+maps_data = None
+
+def read_maps():
+    """
+    Returns the raw contents of /proc/$PID/maps on the server, or None
+    if it is not available.
+    """
+    locations = [
+        '/proc/%s/maps' % pwndbg.proc.pid,
+        '/proc/%s/map'  % pwndbg.proc.pid,
+        '/usr/compat/linux/proc/%s/maps'  % pwndbg.proc.pid,
+    ]
+
+    for location in locations:
+        try:
+            data = pwndbg.file.get(location)
+        except (OSError, gdb.error):
+            continue
+
+        # Missing local files are returned as empty
+        if data:
+            return data
+
+    return None
 
-@pwndbg.memoize.reset_on_stop
+def layout_changed():
+    """
+    Watch point for the 'maps' generation.
+
+    Re-reads /proc/$PID/maps, and reports whether it changed.  If it
+    is not available, the layout must be assumed to have changed.
+    """
+    global maps_data
+    data      = read_maps()
+    changed   = data is None or data != maps_data
+    maps_data = data
+    return changed
+
+pwndbg.memoize.watch('maps', layout_changed)
+
+#: Page objects for each line of /proc/$PID/maps, which are reused
+#: for as long as the line does not change.
+maps_pages = {}
+
+def parse_maps_line(line):
+    """
+    Parses a single line of /proc/$PID/maps into a pwndbg.memory.Page.
+    """
+    if pwndbg.compat.python3:
+        line = line.decode()
+
+    maps, perm, offset, dev, inode_objfile = line.split(None, 4)
+
+    try:    inode, objfile = inode_objfile.split()
+    except: objfile = ''
+
+    start, stop = maps.split('-')
+
+    start  = int(start, 16)
+    stop   = int(stop, 16)
+    offset = int(offset, 16)
+    size   = stop-start
+
+    flags = 0
+    if 'r' in perm: flags |= 4
+    if 'w' in perm: flags |= 2
+    if 'x' in perm: flags |= 1
+
+    return pwndbg.memory.Page(start, size, flags, offset, objfile)
+
+@pwndbg.memoize.reset_on_change(depends=('maps',))
 def proc_pid_maps():
     """
     Parse the contents of /proc/$PID/maps on the server.
@@ -132,47 +345,24 @@ def proc_pid_maps():
     ffffffffff600000-ffffffffff601000 r-xp 00000000 00:00 0                  [vsyscall]
     """
 
-    locations = [
-        '/proc/%s/maps' % pwndbg.proc.pid,
-        '/proc/%s/map'  % pwndbg.proc.pid,
-        '/usr/compat/linux/proc/%s/maps'  % pwndbg.proc.pid,
-    ]
+    global maps_pages
 
-    for location in locations:
-        try:
-            data = pwndbg.file.get(location)
-            break
-        except (OSError, gdb.error):
-            continue
-    else:
+    if maps_data is None:
+        maps_pages = {}
         return tuple()
 
-    if pwndbg.compat.python3:
-        data = data.decode()
-
-    pages = []
-    for line in data.splitlines():
-        maps, perm, offset, dev, inode_objfile = line.split(None, 4)
-
-        try:    inode, objfile = inode_objfile.split()
-        except: objfile = ''
+    # Only lines which changed since the last time need to be parsed
+    lines = maps_data.splitlines()
+    pages = {}
 
-        start, stop = maps.split('-')
+    for line in lines:
+        page = maps_pages.get(line)
+        if page is None:
+            page = parse_maps_line(line)
+        pages[line] = page
 
-        start  = int(start, 16)
-        stop   = int(stop, 16)
-        offset = int(offset, 16)
-        size   = stop-start
-
-        flags = 0
-        if 'r' in perm: flags |= 4
-        if 'w' in perm: flags |= 2
-        if 'x' in perm: flags |= 1
-
-        page = pwndbg.memory.Page(start, size, flags, offset, objfile)
-        pages.append(page)
-
-    return tuple(pages)
+    maps_pages = pages
+    return tuple(pages[line] for line in lines)
 
 
 @pwndbg.memoize.reset_on_objfile
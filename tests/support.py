@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Helpers for testing the parts of pwndbg which do not need GDB or a
+running inferior.
+
+Each module is loaded on its own from its source file.  The ``gdb``
+module, and any pwndbg modules which it imports, are replaced by mocks
+unless real ones are given.
+
+The tests are run with:
+
+    python -m unittest discover -s tests
+"""
+import os
+import re
+import sys
+import types
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'pwndbg')
+
+class error(RuntimeError):
+    pass
+
+class MemoryError(error):
+    pass
+
+def fake_gdb():
+    gdb = mock.MagicMock(name='gdb')
+    gdb.error       = error
+    gdb.MemoryError = MemoryError
+    return gdb
+
+def load(name, modules={}):
+    """
+    Loads the pwndbg module ``name``, e.g. 'elf'.
+
+    ``modules`` maps the names of other pwndbg modules, e.g. 'memory',
+    to the modules to use for them.  All others are mocks.
+    """
+    path = os.path.join(ROOT, *name.split('.')) + '.py'
+
+    with open(path) as f:
+        source = f.read()
+
+    package = types.ModuleType('pwndbg')
+    fake    = {'gdb': fake_gdb(), 'pwndbg': package}
+
+    for dotted in re.findall(r'^import (pwndbg(?:\.\w+)+)', source, re.M):
+        parent = package
+        parts  = dotted.split('.')
+
+        for i in range(1, len(parts)):
+            key = '.'.join(parts[1:i+1])
+
+            if '.'.join(parts[:i+1]) not in fake:
+                module = modules.get(key) or mock.MagicMock(name='pwndbg.' + key)
+                fake['.'.join(parts[:i+1])] = module
+                setattr(parent, parts[i], module)
+
+            parent = fake['.'.join(parts[:i+1])]
+
+    if 'capstone' in source:
+        fake.setdefault('capstone', types.ModuleType('capstone'))
+
+    module = types.ModuleType('pwndbg.' + name)
+    module.__file__ = path
+    fake[module.__name__] = module
+
+    with mock.patch.dict(sys.modules, fake):
+        exec(compile(source, path, 'exec'), module.__dict__)
+
+        # Some modules replace themselves, e.g. pwndbg.regs
+        return sys.modules[module.__name__]
+
+def compat():
+    return load('compat')
+
+def memory():
+    """
+    Returns pwndbg.memory, with the real pwndbg.compat.
+    """
+    return load('memory', {'compat': compat()})
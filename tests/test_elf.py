@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import random
+import struct
+import unittest
+
+import support
+
+memory = support.memory()
+elf    = support.load('elf', {'memory': memory})
+
+PAGE_SIZE = memory.PAGE_SIZE
+
+def ehdr64(**fields):
+    values = dict(e_ident=b'\x7fELF\x02\x01\x01' + b'\x00' * 9, e_type=elf.ET_EXEC,
+                  e_machine=62, e_version=1, e_entry=0x400000, e_phoff=64, e_shoff=0,
+                  e_flags=0, e_ehsize=64, e_phentsize=56, e_phnum=0, e_shentsize=64,
+                  e_shnum=0, e_shstrndx=0)
+    values.update(fields)
+    fmt, names = elf.Ehdr[2]
+    return struct.pack('<' + fmt, *[values[name] for name in names.split()])
+
+def phdr64(**fields):
+    values = dict(p_type=elf.PT_LOAD, p_flags=elf.PF_R, p_offset=0, p_vaddr=0,
+                  p_paddr=0, p_filesz=0, p_memsz=0, p_align=PAGE_SIZE)
+    values.update(fields)
+    fmt, names = elf.Phdr[2]
+    return struct.pack('<' + fmt, *[values[name] for name in names.split()])
+
+def baseline_layout(phdrs):
+    """
+    The page layout as it was computed one page at a time, before
+    get_layout and overlay.
+    """
+    pages = []
+    for phdr in phdrs:
+        memsz = phdr['p_memsz']
+
+        if not memsz:
+            continue
+
+        vaddr  = phdr['p_vaddr']
+        offset = phdr['p_offset']
+        flags  = phdr['p_flags']
+
+        memsz += memory.page_offset(vaddr)
+        memsz  = memory.page_size_align(memsz)
+        vaddr  = memory.page_align(vaddr)
+        offset = memory.page_align(offset)
+
+        for page_addr in range(vaddr, vaddr+memsz, PAGE_SIZE):
+            if page_addr in pages:
+                page = pages[pages.index(page_addr)]
+                if page.flags & elf.PF_X: flags |= elf.PF_X
+                page.flags = flags
+            else:
+                page = memory.Page(page_addr, PAGE_SIZE, flags, offset + (page_addr-vaddr))
+                pages.append(page)
+
+    pages.sort()
+    prev = pages[0]
+    for page in list(pages[1:]):
+        if (prev.flags & elf.PF_W) == (page.flags & elf.PF_W) and prev.vaddr+prev.memsz == page.vaddr:
+            prev.memsz += page.memsz
+            pages.remove(page)
+        else:
+            prev = page
+
+    gaps = []
+    for i in range(len(pages)-1):
+        a, b    = pages[i:i+2]
+        a_end   = a.vaddr + a.memsz
+        if a_end != b.vaddr:
+            gaps.append(memory.Page(a_end, b.vaddr-a_end, 0, b.offset))
+
+    pages.extend(gaps)
+    return [(p.vaddr, p.memsz, p.flags, p.offset) for p in sorted(pages)]
+
+
+class ParseTest(unittest.TestCase):
+    def test_parse_ehdr(self):
+        ehdr = elf.parse_ehdr(ehdr64(e_phnum=3), 0x400000)
+
+        self.assertEqual(ehdr.ei_class, 2)
+        self.assertEqual(ehdr.endian, '<')
+        self.assertEqual(ehdr.address, 0x400000)
+        self.assertEqual(ehdr['e_phnum'], 3)
+        self.assertEqual(ehdr['e_entry'], 0x400000)
+
+    def test_parse_ehdr_rejects_other_data(self):
+        self.assertIsNone(elf.parse_ehdr(b'\x00' * 64))
+        self.assertIsNone(elf.parse_ehdr(b'\x7fELF'))
+        self.assertIsNone(elf.parse_ehdr(b'\x7fELF\x03\x01' + b'\x00' * 58))
+        self.assertIsNone(elf.parse_ehdr(ehdr64()[:40]))
+
+    def test_parse_ehdr_big_endian(self):
+        fmt, names = elf.Ehdr[1]
+        values     = [b'\x7fELF\x01\x02\x01' + b'\x00' * 9] + [0] * (len(names.split()) - 1)
+        values[names.split().index('e_entry')] = 0x10000
+        ehdr       = elf.parse_ehdr(struct.pack('>' + fmt, *values))
+
+        self.assertEqual(ehdr.endian, '>')
+        self.assertEqual(ehdr['e_entry'], 0x10000)
+
+    def test_parse_phdrs(self):
+        ehdr  = elf.parse_ehdr(ehdr64(e_phnum=2))
+        data  = phdr64(p_vaddr=0x1000, p_memsz=0x10) + phdr64(p_vaddr=0x2000, p_flags=elf.PF_W)
+        phdrs = elf.parse_phdrs(ehdr, data, 0x400040)
+
+        self.assertEqual([p['p_vaddr'] for p in phdrs], [0x1000, 0x2000])
+        self.assertEqual(phdrs[0]['p_memsz'], 0x10)
+        self.assertEqual(phdrs[1]['p_flags'], elf.PF_W)
+        self.assertEqual([p.address for p in phdrs], [0x400040, 0x400040 + 56])
+
+    def test_parse_phdrs_drops_truncated_headers(self):
+        ehdr = elf.parse_ehdr(ehdr64(e_phnum=2))
+        data = phdr64() + phdr64()[:30]
+
+        self.assertEqual(len(elf.parse_phdrs(ehdr, data)), 1)
+        self.assertEqual(elf.parse_phdrs(elf.parse_ehdr(ehdr64(e_phentsize=8)), data), [])
+
+    def test_parse_shdrs(self):
+        ehdr = elf.parse_ehdr(ehdr64(e_shnum=2))
+        fmt, names = elf.Shdr[2]
+        data = struct.pack('<' + fmt, *range(10)) + struct.pack('<' + fmt, *range(10, 20))
+
+        shdrs = elf.parse_shdrs(ehdr, data)
+
+        self.assertEqual([s['sh_type'] for s in shdrs], [1, 11])
+        self.assertEqual(shdrs[1]['sh_link'], 16)
+
+    def test_parse_dynamic_stops_at_null(self):
+        ehdr = elf.parse_ehdr(ehdr64())
+        data = struct.pack('<qQqQqQqQ', 1, 2, 5, 0x1234, elf.DT_NULL, 0, 7, 8)
+
+        entries = elf.parse_dynamic(ehdr, data, 0x600000)
+
+        self.assertEqual([(d['d_tag'], d['d_val']) for d in entries], [(1, 2), (5, 0x1234)])
+        self.assertEqual(entries[1].address, 0x600010)
+
+
+class LayoutTest(unittest.TestCase):
+    def layout(self, phdrs):
+        with support.mock.patch.object(elf, 'iter_phdrs', lambda ehdr: phdrs):
+            return list(elf.get_layout(None))
+
+    def test_overlay_splits_ranges(self):
+        segments = elf.overlay([], 0x1000, 0x5000, elf.PF_R | elf.PF_X, 0)
+        segments = elf.overlay(segments, 0x2000, 0x3000, elf.PF_R, 0x9000)
+
+        self.assertEqual(segments, [(0x1000, 0x2000, 5, 0),
+                                    (0x2000, 0x3000, 5, 0x1000),
+                                    (0x3000, 0x5000, 5, 0x2000)])
+
+    def test_overlay_fills_around_existing_ranges(self):
+        segments = elf.overlay([], 0x3000, 0x4000, elf.PF_R, 0x3000)
+        segments = elf.overlay(segments, 0x1000, 0x6000, elf.PF_R | elf.PF_W, 0x1000)
+
+        self.assertEqual(segments, [(0x1000, 0x3000, 6, 0x1000),
+                                    (0x3000, 0x4000, 6, 0x3000),
+                                    (0x4000, 0x6000, 6, 0x4000)])
+
+    def test_typical_layout(self):
+        phdrs = [dict(p_vaddr=0x400000, p_memsz=0x1234, p_offset=0,      p_flags=elf.PF_R | elf.PF_X),
+                 dict(p_vaddr=0x601e10, p_memsz=0x300,  p_offset=0x1e10, p_flags=elf.PF_R | elf.PF_W),
+                 dict(p_vaddr=0x601e10, p_memsz=0x1f0,  p_offset=0x1e10, p_flags=elf.PF_R)]
+
+        self.assertEqual(self.layout(phdrs), [(0x400000, 0x2000,   5, 0),
+                                              (0x402000, 0x1ff000, 0, 0x1000),
+                                              (0x601000, 0x1000,   4, 0x1000),
+                                              (0x602000, 0x1000,   6, 0x2000)])
+
+    def test_same_as_baseline(self):
+        rand = random.Random(1234)
+
+        for _ in range(500):
+            phdrs = []
+            for _ in range(rand.randint(1, 6)):
+                phdrs.append(dict(p_vaddr  = rand.randrange(0, 48 * PAGE_SIZE, 0x10),
+                                  p_memsz  = rand.choice([0, rand.randrange(1, 8 * PAGE_SIZE)]),
+                                  p_offset = rand.randrange(0, 48 * PAGE_SIZE, 0x10),
+                                  p_flags  = rand.randrange(8)))
+
+            if not any(phdr['p_memsz'] for phdr in phdrs):
+                continue
+
+            self.assertEqual(self.layout(phdrs), baseline_layout(phdrs), phdrs)
+
+
+if __name__ == '__main__':
+    unittest.main()
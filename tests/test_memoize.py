@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import unittest
+
+import support
+
+
+class MemoizeTest(unittest.TestCase):
+    def setUp(self):
+        self.memoize = support.load('memoize', {'compat': support.compat()})
+        self.calls   = []
+
+    def function(self, kind=None, **kwargs):
+        kind = kind or self.memoize.reset_on_stop
+
+        def f(x):
+            self.calls.append(x)
+            return 'x' * x
+
+        f.__module__ = 'test'
+        return kind(f, **kwargs)
+
+    def test_cached(self):
+        f = self.function()
+
+        self.assertEqual(f(3), 'xxx')
+        self.assertEqual(f(3), 'xxx')
+        self.assertEqual(self.calls, [3])
+
+        f.clear()
+        f(3)
+        self.assertEqual(self.calls, [3, 3])
+
+    def test_maxsize_evicts_least_recently_used(self):
+        f = self.function(maxsize=2)
+
+        f(1); f(2); f(1); f(3)
+
+        self.assertEqual(list(f.cache), [(1,), (3,)])
+
+        f(2)
+        self.assertEqual(self.calls, [1, 2, 3, 2])
+
+    def test_maxbytes(self):
+        f    = self.function(maxbytes=3000)
+        size = f.sizeof((1000,), 'x' * 1000)
+
+        for i in range(1000, 1010):
+            f(i)
+
+        self.assertEqual(len(f.cache), 3000 // size)
+        self.assertEqual(f.bytes, sum(f.sizes.values()))
+        self.assertLessEqual(f.bytes, 3000)
+        self.assertEqual(list(f.cache)[-1], (1009,))
+
+    def test_resize_counts_existing_entries(self):
+        f = self.function()
+
+        for i in range(1000, 1010):
+            f(i)
+
+        f.resize(maxbytes=3000)
+
+        self.assertLessEqual(f.bytes, 3000)
+        self.assertEqual(f.bytes, sum(f.sizes.values()))
+        self.assertEqual(set(f.sizes), set(f.cache))
+
+        f.resize()
+
+        self.assertEqual(f.bytes, 0)
+        self.assertEqual(f.sizes, {})
+
+    def test_resize_maxsize(self):
+        f = self.function()
+
+        for i in range(10):
+            f(i)
+
+        f.resize(maxsize=4)
+        self.assertEqual(list(f.cache), [(6,), (7,), (8,), (9,)])
+
+    def test_stats(self):
+        f = self.function()
+        self.memoize.stats = True
+
+        f(1); f(1); f(2)
+
+        stats = [s for s in self.memoize.get_stats() if s['name'] == 'test.f'][0]
+        self.assertEqual((stats['hits'], stats['misses'], stats['executions'], stats['entries']), (1, 2, 2, 2))
+
+
+class GenerationTest(unittest.TestCase):
+    def setUp(self):
+        self.memoize = support.load('memoize', {'compat': support.compat()})
+        self.calls   = []
+
+    def function(self, depends):
+        def f():
+            self.calls.append(1)
+            return len(self.calls)
+
+        f.__module__ = 'test'
+        return self.memoize.reset_on_change(f, depends=depends)
+
+    def test_reset_on_bump(self):
+        f = self.function(('regs',))
+
+        self.assertEqual(f(), 1)
+        self.assertEqual(f(), 1)
+
+        self.memoize.bump('writes')
+        self.assertEqual(f(), 1)
+
+        self.memoize.bump('regs')
+        self.assertEqual(f(), 2)
+
+    def test_watch_point(self):
+        changed = [False]
+        checks  = []
+
+        def watcher():
+            checks.append(1)
+            return changed[0]
+
+        self.memoize.watch('maps', watcher)
+        f = self.function(('maps',))
+
+        self.assertEqual(f(), 1)
+        self.assertEqual(len(checks), 1)
+
+        # Watch points only run again once they are marked stale
+        changed[0] = True
+        self.assertEqual(f(), 1)
+        self.assertEqual(len(checks), 1)
+
+        self.memoize.stale.add('maps')
+        self.assertEqual(f(), 2)
+        self.assertEqual(f(), 2)
+        self.assertEqual(len(checks), 2)
+
+        changed[0] = False
+        self.memoize.stale.add('maps')
+        self.assertEqual(f(), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
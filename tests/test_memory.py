@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import unittest
+
+import support
+
+memory = support.memory()
+
+PAGE_SIZE = memory.PAGE_SIZE
+
+
+class Inferior(object):
+    """
+    Memory which is readable from ``start`` to ``end``, where each
+    byte holds the low byte of its address.
+    """
+    def __init__(self, start, end):
+        self.start = start
+        self.end   = end
+        self.reads = []
+
+    def readable(self, page):
+        return self.start <= page < self.end
+
+    def read(self, addr, count, partial=False, view=False):
+        self.reads.append((addr, count))
+
+        if not self.start <= addr < self.end:
+            if partial:
+                return memory.readonly(bytearray())
+            raise support.MemoryError(addr)
+
+        end = min(addr + count, self.end)
+        if end < addr + count and not partial:
+            raise support.MemoryError(end)
+
+        return memory.readonly(bytearray(a & 0xff for a in range(addr, end)))
+
+
+class CountReadablePagesTest(unittest.TestCase):
+    def count(self, inferior, addr, step, max_pages):
+        with support.mock.patch.object(memory, 'readable_page', inferior.readable):
+            return memory.count_readable_pages(addr, step, max_pages)
+
+    def test_upward(self):
+        inferior = Inferior(0x10000, 0x10000 + 37 * PAGE_SIZE)
+
+        self.assertEqual(self.count(inferior, 0x10000, PAGE_SIZE, 1024), 37)
+        self.assertEqual(self.count(inferior, 0x10000, PAGE_SIZE, 10), 10)
+        self.assertEqual(self.count(inferior, 0x10000 + 36 * PAGE_SIZE, PAGE_SIZE, 1024), 1)
+
+    def test_downward(self):
+        inferior = Inferior(0x10000, 0x10000 + 37 * PAGE_SIZE)
+
+        self.assertEqual(self.count(inferior, 0x10000 + 36 * PAGE_SIZE, -PAGE_SIZE, 1024), 37)
+
+    def test_unreadable(self):
+        inferior = Inferior(0x10000, 0x20000)
+
+        self.assertEqual(self.count(inferior, 0x20000, PAGE_SIZE, 1024), 0)
+        self.assertEqual(self.count(inferior, 0x10000, PAGE_SIZE, 0), 0)
+
+    def test_every_size(self):
+        for pages in range(1, 70):
+            inferior = Inferior(0x10000, 0x10000 + pages * PAGE_SIZE)
+            self.assertEqual(self.count(inferior, 0x10000, PAGE_SIZE, 64), min(pages, 64))
+
+
+class ReadManyTest(unittest.TestCase):
+    def read_many(self, inferior, ranges, partial=True):
+        with support.mock.patch.object(memory, 'read', inferior.read):
+            return memory.read_many(ranges, partial)
+
+    def test_merges_ranges(self):
+        inferior = Inferior(0x1000, 0x3000)
+        results  = self.read_many(inferior, [(0x1100, 8), (0x1000, 0x10), (0x1108, 8), (0x1010, 4)])
+
+        self.assertEqual(inferior.reads, [(0x1000, 0x14), (0x1100, 0x10)])
+        self.assertEqual([bytes(r) for r in results],
+                         [bytes(bytearray(range(0, 8))), bytes(bytearray(range(0, 0x10))),
+                          bytes(bytearray(range(8, 0x10))), bytes(bytearray(range(0x10, 0x14)))])
+
+    def test_unreadable_ranges(self):
+        inferior = Inferior(0x1000, 0x2000)
+        results  = self.read_many(inferior, [(0x1ff8, 8), (0x1ffc, 8), (0x2000, 4), (0x0ff0, 4)])
+
+        self.assertEqual(bytes(results[0]), bytes(bytearray(range(0xf8, 0x100))))
+        self.assertEqual(results[1:], [None, None, None])
+
+    def test_not_partial(self):
+        inferior = Inferior(0x1000, 0x2000)
+        results  = self.read_many(inferior, [(0x1ff8, 4), (0x1ffc, 8), (0x1800, 4)], partial=False)
+
+        self.assertEqual(bytes(results[0]), b'\xf8\xf9\xfa\xfb')
+        self.assertIsNone(results[1])
+        self.assertEqual(bytes(results[2]), b'\x00\x01\x02\x03')
+
+    def test_empty(self):
+        inferior = Inferior(0x1000, 0x2000)
+
+        self.assertEqual(self.read_many(inferior, []), [])
+        self.assertEqual(bytes(self.read_many(inferior, [(0, 0)])[0]), b'')
+        self.assertEqual(inferior.reads, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import unittest
+
+import support
+
+regs = support.load('regs', {'compat': support.compat()})
+
+amd64 = regs.arch_to_regs['x86-64']
+arm   = regs.arch_to_regs['arm']
+
+def register_file(regset, values, full=False):
+    """
+    Returns a RegisterFile for ``regset`` with the registers in the
+    dictionary ``values``, and all others zero.
+    """
+    def read_register(name, frame=None):
+        if values.get(name) is None and name in values:
+            raise ValueError(name)
+        return values.get(name, 0)
+
+    # pwndbg.regs replaces itself in sys.modules, so patch its globals
+    with support.mock.patch.dict(regs.RegisterFile.__init__.__globals__, read_register=read_register):
+        return regs.RegisterFile(regset, full)
+
+
+class RegisterSetTest(unittest.TestCase):
+    def test_common_layout(self):
+        self.assertEqual(amd64.names, tuple(amd64.common))
+        self.assertEqual(amd64.index['pc'], amd64.index['rip'])
+        self.assertEqual(amd64.index['sp'], amd64.index['rsp'])
+        self.assertNotIn('eflags', amd64.index)
+
+    def test_full_layout(self):
+        self.assertIn('eflags', amd64.all_index)
+        self.assertEqual(set(amd64.all_names), amd64.all - set(['pc', 'sp']) | set(['rip', 'rsp']))
+        self.assertEqual(amd64.all_index['pc'], amd64.all_index['rip'])
+
+    def test_aliases(self):
+        # 'pc' and 'sp' are the real names on ARM
+        self.assertEqual(arm.names[arm.index['pc']], 'pc')
+        self.assertEqual(arm.names[arm.index['sp']], 'sp')
+
+
+class RegisterFileTest(unittest.TestCase):
+    def test_get(self):
+        r = register_file(amd64, {'rax': 1, 'rip': 0x400000, 'rbx': None})
+
+        self.assertEqual(r.get('rax'), 1)
+        self.assertEqual(r.get('pc'), 0x400000)
+        self.assertIsNone(r.get('rbx'))
+        self.assertIn('rip', r)
+        self.assertNotIn('eflags', r)
+
+    def test_full(self):
+        r = register_file(amd64, {'eflags': 0x246}, full=True)
+
+        self.assertEqual(r.get('eflags'), 0x246)
+
+    def test_changed(self):
+        a = register_file(amd64, {'rax': 1, 'rip': 0x400000})
+        b = register_file(amd64, {'rax': 2, 'rip': 0x400000, 'rcx': 3})
+
+        self.assertEqual(sorted(b.changed(a)), ['rax', 'rcx'])
+        self.assertEqual(a.changed(a), [])
+
+    def test_changed_only_common(self):
+        a = register_file(amd64, {})
+        b = register_file(amd64, {'rax': 1}, full=True)
+
+        self.assertEqual(b.changed(a), list(amd64.all_names))
+
+
+if __name__ == '__main__':
+    unittest.main()
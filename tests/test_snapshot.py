@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import random
+import unittest
+
+import support
+
+memory   = support.memory()
+snapshot = support.load('snapshot', {'compat': support.compat(), 'memory': memory})
+
+PAGE_SIZE = memory.PAGE_SIZE
+
+def page(fill=0):
+    return bytes(bytearray([fill]) * PAGE_SIZE)
+
+def differing(a, b):
+    """
+    The byte-by-byte ranges which differ between ``a`` and ``b``.
+    """
+    a, b   = bytearray(a), bytearray(b)
+    ranges = []
+    for i in range(max(len(a), len(b))):
+        if i < len(a) and i < len(b) and a[i] == b[i]:
+            continue
+        if ranges and ranges[-1][1] == i:
+            ranges[-1][1] = i + 1
+        else:
+            ranges.append([i, i + 1])
+    return ranges
+
+
+class ChangedRangesTest(unittest.TestCase):
+    def test_same(self):
+        self.assertEqual(snapshot.changed_ranges(0x1000, page(), page()), [])
+
+    def test_single_byte(self):
+        b = bytearray(page())
+        b[100] = 1
+
+        self.assertEqual(snapshot.changed_ranges(0x1000, page(), bytes(b)), [(0x1064, 0x1065)])
+
+    def test_adjacent_blocks_are_merged(self):
+        b = bytearray(page())
+        b[60] = b[70] = b[130] = 1
+
+        self.assertEqual(snapshot.changed_ranges(0, page(), bytes(b)), [(60, 131)])
+
+    def test_separate_blocks(self):
+        b = bytearray(page())
+        b[0] = b[200] = b[PAGE_SIZE-1] = 1
+
+        self.assertEqual(snapshot.changed_ranges(0, page(), bytes(b)),
+                         [(0, 1), (200, 201), (PAGE_SIZE-1, PAGE_SIZE)])
+
+    def test_different_lengths(self):
+        self.assertEqual(snapshot.changed_ranges(0, b'ab', b'abc'), [(2, 3)])
+        self.assertEqual(snapshot.changed_ranges(0, b'abc', b'ab'), [(2, 3)])
+
+    def test_covers_every_change(self):
+        rand = random.Random(1234)
+
+        for _ in range(200):
+            a = bytearray(page())
+            b = bytearray(a)
+            for _ in range(rand.randint(1, 20)):
+                b[rand.randrange(PAGE_SIZE)] = rand.randint(1, 255)
+
+            got = snapshot.changed_ranges(0, bytes(a), bytes(b))
+
+            for start, end in differing(a, b):
+                self.assertTrue(any(s <= start and end <= e for s, e in got))
+
+            # Every range starts and ends with a changed byte
+            for start, end in got:
+                self.assertNotEqual(a[start], b[start])
+                self.assertNotEqual(a[end-1], b[end-1])
+
+
+class StoreTest(unittest.TestCase):
+    def test_duplicates_are_stored_once(self):
+        store = snapshot.Store()
+
+        x = store.add(page(1))
+        y = store.add(page(1))
+
+        self.assertEqual(x, y)
+        self.assertEqual(store.size, PAGE_SIZE)
+        self.assertEqual(store.get(x), page(1))
+
+    def test_release(self):
+        store  = snapshot.Store()
+        digest = store.add(page(1))
+        store.add(page(1))
+
+        store.release(digest)
+        self.assertEqual(store.get(digest), page(1))
+
+        store.release(digest)
+        self.assertNotIn(digest, store.pages)
+        self.assertEqual(store.size, 0)
+
+    def test_spill(self):
+        store   = snapshot.Store(limit=PAGE_SIZE)
+        digests = [store.add(page(i)) for i in range(4)]
+
+        self.assertEqual(store.size, PAGE_SIZE)
+        self.assertEqual([store.get(d) for d in digests], [page(i) for i in range(4)])
+
+        # Less than half of the spill file is unused
+        store.release(digests[1])
+        store.compact()
+        self.assertEqual(store.wasted, PAGE_SIZE)
+
+        store.release(digests[2])
+        store.compact()
+        self.assertEqual(store.wasted, 0)
+        self.assertEqual(store.pages[digests[3]], (0, PAGE_SIZE))
+        self.assertEqual(store.get(digests[3]), page(3))
+
+        store.release(digests[3])
+        store.compact()
+        self.assertIsNone(store.spill)
+        self.assertEqual(store.get(digests[0]), page(0))
+
+
+class DiffTest(unittest.TestCase):
+    def setUp(self):
+        snapshot.store.clear()
+        snapshot.snapshots.clear()
+
+    def save(self, name, pages):
+        s = snapshot.Snapshot(name)
+        for address, data in pages.items():
+            s.pages[address] = snapshot.store.add(data)
+        snapshot.snapshots[name] = s
+
+    def test_diff(self):
+        changed = bytearray(page())
+        changed[PAGE_SIZE-1] = 1
+        after = bytearray(page())
+        after[0] = 1
+
+        self.save('a', {0x1000: page(), 0x2000: page(), 0x3000: page(), 0x5000: page()})
+        self.save('b', {0x1000: page(), 0x2000: bytes(changed), 0x3000: bytes(after), 0x6000: page()})
+
+        self.assertEqual(snapshot.diff('a', 'b'), [(0x2fff, 0x3001), (0x5000, 0x7000)])
+
+    def test_delete_frees_pages(self):
+        self.save('a', {0x1000: page(1), 0x2000: page(2)})
+        self.save('b', {0x1000: page(1), 0x2000: page(3)})
+
+        snapshot.delete('a')
+        self.assertEqual(len(snapshot.store.pages), 2)
+
+        snapshot.delete('b')
+        self.assertEqual(snapshot.store.pages, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import struct
+import tempfile
+import unittest
+
+import support
+
+compat = support.compat()
+memory = support.memory()
+elf    = support.load('elf', {'memory': memory})
+symtab = support.load('symtab', {'compat': compat, 'elf': elf, 'memory': memory})
+
+def write_elf(symbols):
+    """
+    Writes a 64-bit ELF file with a .symtab holding ``symbols``, a list
+    of ``(name, value, size, info, shndx)``, and returns its path.
+    """
+    strings = b'\x00'
+    entries = struct.pack('<IBBHQQ', 0, 0, 0, 0, 0, 0)
+
+    for name, value, size, info, shndx in symbols:
+        entries += struct.pack('<IBBHQQ', len(strings), info, 0, shndx, value, size)
+        strings += name.encode() + b'\x00'
+
+    symoff = 64
+    stroff = symoff + len(entries)
+    shoff  = stroff + len(strings)
+
+    fmt, names = elf.Ehdr[2]
+    ehdr = dict.fromkeys(names.split(), 0)
+    ehdr.update(e_ident=b'\x7fELF\x02\x01\x01' + b'\x00' * 9, e_type=elf.ET_DYN,
+                e_phoff=64, e_phentsize=56, e_shoff=shoff, e_shentsize=64, e_shnum=3)
+
+    shdr = '<IIQQQQIIQQ'
+    data = struct.pack('<' + fmt, *[ehdr[name] for name in names.split()])
+    data += entries + strings
+    data += struct.pack(shdr, *[0] * 10)
+    data += struct.pack(shdr, 0, elf.SHT_SYMTAB, 0, 0, symoff, len(entries), 2, 0, 8, 24)
+    data += struct.pack(shdr, 0, 3, 0, 0, stroff, len(strings), 0, 0, 1, 0)
+
+    fd, path = tempfile.mkstemp()
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    return path
+
+GLOBAL_FUNC = (symtab.STB_GLOBAL << 4) | 2
+LOCAL_FUNC  = (symtab.STB_LOCAL << 4) | 2
+
+
+class SymbolTableTest(unittest.TestCase):
+    def test_lookup(self):
+        table = symtab.SymbolTable([(0x1000, 0x10, 'a'), (0x1010, 0x20, 'b'), (0x2000, 1, 'c')])
+
+        self.assertEqual(len(table), 3)
+        self.assertEqual(table.lookup(0x1000), 'a')
+        self.assertEqual(table.lookup(0x100f), 'a+15')
+        self.assertEqual(table.lookup(0x1010), 'b')
+        self.assertEqual(table.lookup(0x2000), 'c')
+
+        for address in (0, 0xfff, 0x1030, 0x2001):
+            self.assertIsNone(table.lookup(address), hex(address))
+
+    def test_nested(self):
+        table = symtab.SymbolTable([(0x1000, 0x100, 'outer'), (0x1010, 0x10, 'inner')])
+
+        self.assertEqual(table.lookup(0x1018), 'inner+8')
+        self.assertEqual(table.lookup(0x1020), 'outer+32')
+        self.assertEqual(table.lookup(0x10ff), 'outer+255')
+
+    def test_names_are_shared(self):
+        table = symtab.SymbolTable([(0x1000, 8, 'a'), (0x2000, 8, 'a')])
+
+        self.assertEqual(table.names, ['a'])
+        self.assertEqual(table.lookup(0x2004), 'a+4')
+
+
+class ReadSymbolsTest(unittest.TestCase):
+    def read(self, symbols):
+        path = write_elf(symbols)
+        try:
+            load, symbols = symtab.read_symbols(path)
+        finally:
+            os.unlink(path)
+        return load, sorted(symbols)
+
+    def test_read_symbols(self):
+        load, symbols = self.read([('main',          0x1000, 0x20, GLOBAL_FUNC, 1),
+                                   ('__libc_system', 0x2000, 0x10, GLOBAL_FUNC, 1),
+                                   ('system',        0x2000, 0x10, GLOBAL_FUNC, 1),
+                                   ('helper',        0x3000, 0x10, LOCAL_FUNC,  1),
+                                   ('exported',      0x3000, 0x10, GLOBAL_FUNC, 1)])
+
+        self.assertEqual(load, 0)
+        self.assertEqual(symbols, [(0x1000, 0x20, 'main'),
+                                   (0x2000, 0x10, 'system'),
+                                   (0x3000, 0x10, 'exported')])
+
+    def test_skipped_symbols(self):
+        load, symbols = self.read([('sizeless',   0x1000, 0,    GLOBAL_FUNC, 1),
+                                   ('undefined',  0x2000, 0x10, GLOBAL_FUNC, symtab.SHN_UNDEF),
+                                   ('absolute',   0x3000, 0x10, GLOBAL_FUNC, symtab.SHN_ABS),
+                                   ('file.c',     0x4000, 0x10, symtab.STT_FILE, 1),
+                                   ('_ZN3foo3barEv', 0x5000, 0x10, GLOBAL_FUNC, 1),
+                                   ('kept',       0x6000, 0x10, GLOBAL_FUNC, 1)])
+
+        self.assertEqual(symbols, [(0x6000, 0x10, 'kept')])
+
+    def test_not_elf(self):
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            self.assertIsNone(symtab.read_symbols(path))
+        finally:
+            os.unlink(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
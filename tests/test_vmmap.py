@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import unittest
+
+import support
+
+compat = support.compat()
+memory = support.memory()
+vmmap  = support.load('vmmap', {'compat': compat, 'memory': memory})
+
+Page = memory.Page
+
+def table():
+    return vmmap.PageTable([Page(0x7000, 0x3000, 4, 0x1000, '/bin/ls'),
+                            Page(0x1000, 0x2000, 5, 0,      '/bin/ls'),
+                            Page(0x3000, 0x1000, 0, 0x2000, '/bin/ls'),
+                            Page(0x4000, 0x1000, 6, 0,      '[heap]'),
+                            Page(0x10000, 0x1000, 6, 0,     '')])
+
+
+class PageTableTest(unittest.TestCase):
+    def test_sorted(self):
+        t = table()
+
+        self.assertEqual(len(t), 5)
+        self.assertEqual(list(t.starts), [0x1000, 0x3000, 0x4000, 0x7000, 0x10000])
+        self.assertEqual([page.vaddr for page in t], list(t.starts))
+
+    def test_find(self):
+        t = table()
+
+        self.assertEqual(t.find(0x1000).vaddr, 0x1000)
+        self.assertEqual(t.find(0x2fff).vaddr, 0x1000)
+        self.assertEqual(t.find(0x3000).vaddr, 0x3000)
+        self.assertEqual(t.find(0x9fff).vaddr, 0x7000)
+        self.assertEqual(t.find(0x10800).vaddr, 0x10000)
+
+        for address in (0, 0xfff, 0x5000, 0x6fff, 0xa000, 0x11000):
+            self.assertIsNone(t.find(address), hex(address))
+
+    def test_find_after_last_lookup(self):
+        t = table()
+
+        self.assertEqual(t.find(0x7000).vaddr, 0x7000)
+        self.assertEqual(t.find(0x1000).vaddr, 0x1000)
+        self.assertIsNone(t.find(0x6000))
+
+    def test_find_overlapping(self):
+        # e.g. a large explored page which contains smaller pages
+        t = vmmap.PageTable([Page(0x1000, 0x10000, 4, 0),
+                             Page(0x2000, 0x1000, 6, 0),
+                             Page(0x4000, 0x1000, 6, 0)])
+
+        self.assertEqual(t.find(0x2800).vaddr, 0x2000)
+        self.assertEqual(t.find(0x3800).vaddr, 0x1000)
+        self.assertEqual(t.find(0x8000).vaddr, 0x1000)
+        self.assertIsNone(t.find(0x11000))
+
+    def test_empty(self):
+        t = vmmap.PageTable([])
+
+        self.assertEqual(len(t), 0)
+        self.assertIsNone(t.find(0x1000))
+        self.assertEqual(t.where(), [])
+
+    def test_names_are_shared(self):
+        self.assertEqual(sorted(table().names), ['', '/bin/ls', '[heap]'])
+
+    def test_where(self):
+        t = table()
+
+        self.assertEqual(t.where(), [0, 1, 2, 3, 4])
+        self.assertEqual(t.where(flags=2), [2, 4])
+        self.assertEqual(t.where(flags=4), [0, 2, 3, 4])
+        self.assertEqual(t.where(objfile='ls'), [0, 1, 3])
+        self.assertEqual(t.where(flags=4, objfile='ls'), [0, 3])
+        self.assertEqual(t.where(address=0x4800), [2])
+
+    def test_ranges(self):
+        self.assertEqual(table().ranges(flags=2), [(0x4000, 0x5000), (0x10000, 0x11000)])
+
+
+class ParseMapsLineTest(unittest.TestCase):
+    def parse(self, line):
+        if compat.python3:
+            line = line.encode()
+        return vmmap.parse_maps_line(line)
+
+    def test_file(self):
+        page = self.parse('7f95266fa000-7f95268b5000 r-xp 001bb000 08:01 418404                     /lib/x86_64-linux-gnu/libc-2.19.so')
+
+        self.assertEqual(page.vaddr, 0x7f95266fa000)
+        self.assertEqual(page.memsz, 0x7f95268b5000 - 0x7f95266fa000)
+        self.assertEqual(page.flags, 5)
+        self.assertEqual(page.offset, 0x1bb000)
+        self.assertEqual(page.objfile, '/lib/x86_64-linux-gnu/libc-2.19.so')
+
+    def test_anonymous(self):
+        page = self.parse('7f9526abb000-7f9526ac0000 rw-p 00000000 00:00 0')
+
+        self.assertEqual(page.flags, 6)
+        self.assertEqual(page.objfile, '')
+
+    def test_no_access(self):
+        page = self.parse('7f95268b5000-7f9526ab5000 ---p 001bb000 08:01 418404                     /lib/x86_64-linux-gnu/libc-2.19.so')
+
+        self.assertEqual(page.flags, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()